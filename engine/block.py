@@ -1,17 +1,76 @@
-import math
+# Helligkeit der sechs Würfelseiten in der Reihenfolge von FACE_OFFSETS (-x, +x, -y, +y, -z, +z)
+FACE_SHADES = (0.55, 0.75, 0.60, 0.85, 0.50, 0.70)
+# Helligkeit der Seiten des Blocks im HUD (oben, Seite, vorne)
+HUD_SHADES = (0.9, 0.75, 1.0)
 
-# Definieren der Blockfarben
-BLOCK_COLORS = {
-    "stone": (128, 128, 128),
-    "dirt": (139, 69, 19),
-    "grass": (0, 100, 0),
-    "leaves": (50, 205, 50),
-    "log": (160, 82, 45),
+# Farbe als Tk-Hexstring, abgedunkelt um shade
+def shaded_hex(color, shade):
+    r, g, b = (int(c * shade) for c in color)
+    return f"#{r:02x}{g:02x}{b:02x}"
 
-    "blue": (51, 153, 255),
-    "red": (180, 0, 0),
-    "yellow": (255, 255, 0)
-}
+# Eigenschaften einer Blockart, die Farben aller Seiten werden beim Start einmal berechnet.
+# solid: Spieler kollidiert; transparent: Nachbarflächen bleiben sichtbar; opaque: verdeckt Nachbarflächen
+class BlockType:
+    def __init__(self, name, block_id, color, solid=True, transparent=False):
+        self.name = name
+        self.id = block_id
+        self.color = color
+        self.solid = solid
+        self.transparent = transparent
+        self.opaque = solid and not transparent
+        self.face_colors = tuple(shaded_hex(color, shade) for shade in FACE_SHADES)
+        self.hud_colors = tuple(shaded_hex(color, shade) for shade in HUD_SHADES)
+
+# Verzeichnis aller Blockarten mit fortlaufenden IDs in Reihenfolge der Registrierung.
+# Die IDs landen in Spielständen, neue Arten dürfen daher nur hinten angehängt werden.
+class BlockRegistry:
+    def __init__(self, fallback_color=(255, 255, 255)):
+        self.types = []
+        self.by_name = {}
+        # Farben der sechs Seiten je ID, im Renderloop nur noch nachgeschlagen
+        self.face_colors = []
+        self.fallback = BlockType("unknown", None, fallback_color)
+
+    def register(self, name, color, solid=True, transparent=False):
+        if name in self.by_name:
+            raise ValueError(f"Blockart '{name}' ist bereits registriert")
+        block_type = BlockType(name, len(self.types), color, solid, transparent)
+        self.types.append(block_type)
+        self.by_name[name] = block_type
+        self.face_colors.append(block_type.face_colors)
+        return block_type
+
+    # Blockart zu einem Namen, unbekannte Namen bekommen die Ersatzfarbe
+    def get(self, name):
+        return self.by_name.get(name, self.fallback)
+
+    def from_id(self, block_id):
+        return self.types[block_id]
+
+    def names(self):
+        return [block_type.name for block_type in self.types]
+
+BLOCKS = BlockRegistry()
+# Luft hat immer die ID 0
+AIR = BLOCKS.register("air", (0, 0, 0), solid=False, transparent=True)
+BLOCKS.register("stone", (128, 128, 128))
+BLOCKS.register("dirt", (139, 69, 19))
+BLOCKS.register("grass", (0, 100, 0))
+BLOCKS.register("leaves", (50, 205, 50))
+BLOCKS.register("log", (160, 82, 45))
+
+BLOCKS.register("blue", (51, 153, 255))
+BLOCKS.register("red", (180, 0, 0))
+BLOCKS.register("yellow", (255, 255, 0))
+
+BLOCKS.register("coal_ore", (60, 60, 60))
+BLOCKS.register("iron_ore", (196, 150, 120))
+
+# Ältere Sichten auf das Verzeichnis: Farben der setzbaren Blöcke sowie Namen und IDs, 0 ist Luft
+AIR_ID = AIR.id
+BLOCK_COLORS = {block_type.name: block_type.color for block_type in BLOCKS.types if block_type.id != AIR_ID}
+BLOCK_TYPES = BLOCKS.names()
+BLOCK_IDS = {name: block_id for block_id, name in enumerate(BLOCK_TYPES)}
 
 # Klasse für Blöcke, als Veranschaulichung und Sammlund der Funktionen
 class Block:
@@ -23,99 +82,11 @@ class Block:
         self.id = block_id
         self.color = BLOCK_COLORS.get(block_id, (255, 255, 255))
 
+    # Erzeugen einer Blockansicht aus einer gespeicherten ID
+    @classmethod
+    def from_id(cls, x, y, z, block_id):
+        return cls(x, y, z, BLOCK_TYPES[block_id])
+
     # Ausgabe der Position
     def get_position(self):
         return (self.x, self.y, self.z)
-
-    # Malen des Blocks
-    def draw(self, renderer):
-        # Größe um den Mittelpunkt; Mittelpunkt; Liste der gemalten; Seiten; Eckpunkte 
-        size = 0.5
-        bx, by, bz = self.x, self.y, self.z
-        block_set = renderer.block_set
-        sides = renderer.sides
-        faces = []
-        vertices = [
-            (bx-size, by-size, bz-size),
-            (bx+size, by-size, bz-size),
-            (bx+size, by+size, bz-size),
-            (bx-size, by+size, bz-size),
-            (bx-size, by-size, bz+size),
-            (bx+size, by-size, bz+size),
-            (bx+size, by+size, bz+size),
-            (bx-size, by+size, bz+size),
-        ]
-
-        # Für jede Seite:
-        for (offset, idxs, shade) in sides:
-            # Occlusion culling
-            nx, ny, nz = bx+offset[0], by+offset[1], bz+offset[2]
-            if (nx, ny, nz) in block_set:
-                continue
-
-            # Backface culling
-            mx = sum(vertices[i][0] for i in idxs) / 4
-            my = sum(vertices[i][1] for i in idxs) / 4
-            mz = sum(vertices[i][2] for i in idxs) / 4
-            normal = offset
-            to_cam = (
-                renderer.cam_x - mx,
-                renderer.cam_y - my,
-                renderer.cam_z - mz
-            )
-            dot = (normal[0]*to_cam[0] + normal[1]*to_cam[1] + normal[2]*to_cam[2])
-            if dot <= 0:
-                continue
-            # forward, _, _ = renderer.get_camera_vectors()
-            # visible = True
-            # for idx in idxs:
-            #     vx, vy, vz = vertices[idx]
-            #     face_vec = (vx-renderer.cam_x, vy-renderer.cam_y, vz-renderer.cam_z)
-            #     face_len = sum(i*i for i in face_vec) ** 0.5
-            #     if face_len == 0:
-            #         continue
-            #     face_dir = tuple(i/face_len for i in face_vec)
-            #     dot_fwd = sum(face_dir[i]*forward[i] for i in range(3))
-            #     angle = math.degrees(math.acos(max(-1,min(1,dot_fwd))))
-            #     if angle <= fov_x/2 + 10:
-            #         visible = True
-            #         break
-            # if not visible:
-            #     continue
-
-            #?????
-            # dzs = []
-            # cam = (renderer.cam_x, renderer.cam_y, renderer.cam_z)
-            # forward, right, up = renderer.get_camera_vectors()
-            # for idx in idxs:
-            #     vx, vy, vz = vertices[idx]
-            #     px, py, pz = vx-cam[0], vy-cam[1], vz-cam[2]
-            #     dz = px*forward[0] + py*forward[1] + pz*forward[2]
-            #     dzs.append(dz)
-
-
-            # Projektion der Eckpunkte auf die Bildfläche
-            projected = []
-            dzs = []
-            for (x, y, z) in vertices:
-                uv, dz = renderer.project(x, y, z) 
-                dzs.append(dz)
-                projected.append(uv)
-
-
-            if all(dz <= 0.1 for dz in dzs):
-                continue
-                
-            # Entfernen ungültiger Flächern
-            if any([projected[i] is None for i in idxs]):
-                continue
-
-            dist = (mx-renderer.cam_x)**2 + (my-renderer.cam_y)**2 + (mz-renderer.cam_z)**2
-            face = {
-                "points": [projected[i] for i in idxs],
-                "shade": shade,
-                "dist": dist,
-                "color": self.color
-            }
-            faces.append(face)
-        return faces
@@ -20,29 +20,58 @@ def get_camera_vectors(cam_yaw_degrees, cam_pitch_degrees):
     
     return (fx, fy, fz), (rx, ry, rz), (ux, uy, uz)
 
-# Berechnung der Bildpunkte eines Punktes in der Welt 
-def project_point(world_x, world_y, world_z, 
-                  cam_x, cam_y, cam_z, 
-                  forward_vec, right_vec, up_vec, 
-                  win_w, win_h,
-                  fov,  min_depth=0.1):
+# Unveränderlicher Kamerastand eines Bildes: Position, Blickmatrix, Brennweiten, Nahebene und Bildgröße.
+# Wird einmal pro Bild erzeugt und von allen Projektionen, dem Culling und den Blickstrahlen genutzt.
+class Camera:
+    __slots__ = ("position", "yaw", "pitch", "forward", "right", "up", "view",
+                 "fov", "win_w", "win_h", "focal_x", "focal_y", "near")
+
+    def __init__(self, x, y, z, yaw, pitch, fov, viewport, near=0.1):
+        forward, right, up = get_camera_vectors(yaw, pitch)
+        # Zeilen der Blickmatrix: rechts, oben, vorne
+        view = np.array([right, up, forward], dtype=np.float64)
+        view.flags.writeable = False
+        win_w, win_h = viewport
+        focal_y = (win_h / 2) / math.tan(math.radians(fov) / 2)
+        values = {
+            "position": (x, y, z), "yaw": yaw, "pitch": pitch,
+            "forward": forward, "right": right, "up": up, "view": view,
+            "fov": fov, "win_w": win_w, "win_h": win_h,
+            "focal_x": focal_y * (win_w / win_h), "focal_y": focal_y, "near": near,
+        }
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Camera ist unveränderlich, für ein neues Bild eine neue Camera erzeugen")
+
+    # Projektion eines einzelnen Punktes, Ausgabe als Bildpunkt und Tiefe vor dem Begrenzen auf die Nahebene
+    def project(self, x, y, z):
+        px, py, pz = x - self.position[0], y - self.position[1], z - self.position[2]
+        (rx, ry, rz), (ux, uy, uz), (fx, fy, fz) = self.right, self.up, self.forward
+        dx = px * rx + py * ry + pz * rz
+        dy = px * ux + py * uy + pz * uz
+        depth = px * fx + py * fy + pz * fz
+        dz = max(depth, self.near)
+        # die horizontale Brennweite wird für beide Achsen verwendet
+        return (dx / dz * self.focal_x, dy / dz * self.focal_x), depth
+
+# Bildpunkte vieler Punkte in einem Aufruf, points hat die Form (n, 3).
+# Ausgabe: Bildpunkte (n, 2) und Tiefen (n,) vor dem Begrenzen auf die Nahebene
+def project_points(points, camera):
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
     # Translation
-    px, py, pz = world_x - cam_x, world_y - cam_y, world_z - cam_z
+    px, py, pz = (points - camera.position).T
 
     # Rotation
-    dx = px * right_vec[0] + py * right_vec[1] + pz * right_vec[2]
-    dy = px * up_vec[0] + py * up_vec[1] + pz * up_vec[2]
-    dz = normal_dz = px * forward_vec[0] + py * forward_vec[1] + pz * forward_vec[2]
-
-    if dz <= min_depth:
-        dz = min_depth
+    (rx, ry, rz), (ux, uy, uz), (fx, fy, fz) = camera.view.tolist()
+    dx = px * rx + py * ry + pz * rz
+    dy = px * ux + py * uy + pz * uz
+    depth = px * fx + py * fy + pz * fz
 
     # Skalierung der Projektion auf den Bildschirm
-    fov = math.radians(fov)
-    fy = (win_h / 2) / math.tan((fov) / 2)
-    fx = fy * (win_w / win_h)
-    screen_x = dx / dz * fx
-    screen_y = dy / dz * fx
-    
-    # Ausgabe Bildpunkte
-    return (screen_x, screen_y), normal_dz
+    dz = np.maximum(depth, camera.near)
+    screen = np.empty((len(points), 2))
+    screen[:, 0] = dx / dz * camera.focal_x
+    screen[:, 1] = dy / dz * camera.focal_x
+    return screen, depth
@@ -0,0 +1,124 @@
+from .block import AIR_ID, BLOCKS
+from .mesh import ALL_FACES, FACE_OFFSETS, build_chunk_mesh
+import numpy as np
+
+# Kantenlänge eines Chunks in Blöcken (x und z)
+CHUNK_SIZE = 16
+# Datentyp der Block-IDs
+BLOCK_DTYPE = np.uint8
+
+# Verdeckt eine Block-ID die Flächen ihrer Nachbarn
+OPAQUE_BY_ID = np.zeros(256, dtype=bool)
+for _block_type in BLOCKS.types:
+    OPAQUE_BY_ID[_block_type.id] = _block_type.opaque
+
+# Chunkkoordinaten einer Weltkoordinate
+def chunk_coords(x, z):
+    return x // CHUNK_SIZE, z // CHUNK_SIZE
+
+# Säule aus 16x16 Blöcken über die gesamte Welthöhe
+class Chunk:
+    # Initialisierung mit eigenem Blockspeicher
+    def __init__(self, cx, cz, height, blocks=None, dirty=False):
+        self.cx = cx
+        self.cz = cz
+        self.height = height
+        if blocks is None:
+            blocks = np.zeros((CHUNK_SIZE, height, CHUNK_SIZE), dtype=BLOCK_DTYPE)
+        self.blocks = blocks
+        # Geändert seit dem letzten Speichern
+        self.dirty = dirty
+        # Höhe des obersten festen Blocks je Säule (-1 wenn leer), wird erst bei Bedarf berechnet
+        self._heightmap = None
+        # Bitmaske der freien Seiten je Zelle, ebenfalls erst bei Bedarf berechnet
+        self._exposure = None
+        # Freie Flächen als ChunkMesh, wird bei jeder Änderung der Sichtbarkeitsmaske verworfen
+        self._mesh = None
+
+    # Weltkoordinaten der Ecke mit den kleinsten Koordinaten
+    def get_origin(self):
+        return self.cx * CHUNK_SIZE, self.cz * CHUNK_SIZE
+
+    # Höhenkarte aus (x, z) mit der Höhe des obersten festen Blocks
+    def get_heightmap(self):
+        if self._heightmap is None:
+            solid = self.blocks != 0
+            # erster fester Block von oben, Säulen ohne festen Block bekommen -1
+            top = self.height - 1 - np.argmax(solid[:, ::-1, :], axis=1)
+            self._heightmap = np.where(solid.any(axis=1), top, -1).astype(np.int16)
+        return self._heightmap
+
+    # Sichtbarkeitsmaske aller Zellen: Bit i ist gesetzt, wenn Seite i eines Blocks an keinen
+    # undurchsichtigen Block grenzt. neighbours sind die Chunks bei -x, +x, -z und +z oder None,
+    # fehlende Nachbarn und alles über und unter der Welt gelten als frei.
+    def get_exposure(self, neighbours):
+        if self._exposure is None:
+            size, height = CHUNK_SIZE, self.height
+            opaque = np.zeros((size + 2, height + 2, size + 2), dtype=bool)
+            opaque[1:-1, 1:-1, 1:-1] = OPAQUE_BY_ID[self.blocks]
+            west, east, north, south = neighbours
+            if west is not None:
+                opaque[0, 1:-1, 1:-1] = OPAQUE_BY_ID[west.blocks[-1]]
+            if east is not None:
+                opaque[-1, 1:-1, 1:-1] = OPAQUE_BY_ID[east.blocks[0]]
+            if north is not None:
+                opaque[1:-1, 1:-1, 0] = OPAQUE_BY_ID[north.blocks[:, :, -1]]
+            if south is not None:
+                opaque[1:-1, 1:-1, -1] = OPAQUE_BY_ID[south.blocks[:, :, 0]]
+            exposure = np.zeros(self.blocks.shape, dtype=np.uint8)
+            for bit, (dx, dy, dz) in enumerate(FACE_OFFSETS):
+                covered = opaque[1 + dx:1 + dx + size, 1 + dy:1 + dy + height, 1 + dz:1 + dz + size]
+                exposure |= (~covered).astype(np.uint8) << np.uint8(bit)
+            exposure[self.blocks == AIR_ID] = 0
+            self._exposure = exposure
+        return self._exposure
+
+    # Freie Flächen des Chunks, neu aufgebaut nur nach Änderungen am Chunk oder an seinen Rändern
+    def get_mesh(self, neighbours):
+        if self._mesh is None:
+            self._mesh = build_chunk_mesh(self.blocks, self.get_exposure(neighbours), (self.cx * CHUNK_SIZE, 0, self.cz * CHUNK_SIZE))
+        return self._mesh
+
+    # Verwerfen der Sichtbarkeitsmaske, z.B. wenn ein Nachbarchunk geladen oder entladen wurde
+    def invalidate_exposure(self):
+        self._exposure = None
+        self._mesh = None
+
+    # Setzen der ganzen Maske einer Zelle, nur wenn sie schon berechnet wurde
+    def set_exposure(self, lx, y, lz, mask):
+        if self._exposure is not None and self._exposure[lx, y, lz] != mask:
+            self._exposure[lx, y, lz] = mask
+            self._mesh = None
+
+    # Setzen oder Löschen des Bits einer Seite einer Zelle, nur wenn die Maske schon berechnet wurde
+    def set_face_exposed(self, lx, y, lz, bit, exposed):
+        if self._exposure is not None:
+            old = int(self._exposure[lx, y, lz])
+            mask = old | (1 << bit) if exposed else old & (ALL_FACES ^ (1 << bit))
+            if mask != old:
+                self._exposure[lx, y, lz] = mask
+                self._mesh = None
+
+    # Setzen einer Block-ID, die Höhenkarte wird nur angepasst, wenn sich der oberste Block ändert
+    def set_block(self, lx, y, lz, block_id):
+        # das Mesh enthält die Block-IDs als Farbindex und wird auch bei gleicher Sichtbarkeitsmaske neu aufgebaut
+        if self.blocks[lx, y, lz] != block_id:
+            self._mesh = None
+        self.blocks[lx, y, lz] = block_id
+        self.dirty = True
+        if self._heightmap is None:
+            return
+        top = self._heightmap[lx, lz]
+        if block_id and y > top:
+            self._heightmap[lx, lz] = y
+        elif not block_id and y == top:
+            solid_ys = np.flatnonzero(self.blocks[lx, :y, lz])
+            self._heightmap[lx, lz] = solid_ys[-1] if len(solid_ys) else -1
+
+    # Setzen vieler Block-IDs auf einmal, die Höhenkarte wird danach neu berechnet
+    def set_blocks(self, lxs, ys, lzs, block_ids):
+        self.blocks[lxs, ys, lzs] = block_ids
+        self.dirty = True
+        self._heightmap = None
+        self._exposure = None
+        self._mesh = None
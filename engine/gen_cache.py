@@ -0,0 +1,117 @@
+from .chunk import CHUNK_SIZE, BLOCK_DTYPE
+from .generation import GENERATOR_VERSION, generate_chunk
+from collections import OrderedDict
+import hashlib
+import os
+import threading
+import zlib
+import numpy as np
+
+# Zwischenspeicher generierter Chunks auf dem Datenträger.
+# Dateiname ist ein Hash aus Generatorversion und allen Generatorparametern,
+# Einträge anderer Generatorversionen werden beim Öffnen gelöscht.
+# Überschreitet der Ordner max_bytes, werden die am längsten nicht genutzten Einträge entfernt.
+CACHE_EXTENSION = ".chunk"
+COMPRESSION_LEVEL = 1
+
+class GenerationCache:
+    def __init__(self, directory, max_bytes=64 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Dateiname -> Größe, vom ältesten zum zuletzt genutzten Eintrag
+        self._entries = None
+        self._total = 0
+
+    # Präfix der Einträge der aktuellen Generatorversion
+    @staticmethod
+    def _prefix():
+        return f"v{GENERATOR_VERSION}-"
+
+    # Dateiname zu den Parametern eines Chunks
+    def _filename(self, cx, cz, seed, height, scale, height_ratio):
+        key = repr((seed, height, float(scale), [float(r) for r in height_ratio], cx, cz)).encode("utf-8")
+        return self._prefix() + hashlib.sha1(key).hexdigest() + CACHE_EXTENSION
+
+    # Einlesen des Ordners beim ersten Zugriff, veraltete Versionen werden gelöscht
+    def _scan(self):
+        if self._entries is not None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        found = []
+        for filename in os.listdir(self.directory):
+            path = os.path.join(self.directory, filename)
+            if not filename.endswith(CACHE_EXTENSION):
+                continue
+            if not filename.startswith(self._prefix()):
+                os.remove(path)
+                continue
+            stat = os.stat(path)
+            found.append((stat.st_mtime, filename, stat.st_size))
+        self._entries = OrderedDict((filename, size) for _, filename, size in sorted(found))
+        self._total = sum(self._entries.values())
+
+    # Lesen eines Eintrags, None wenn er fehlt oder beschädigt ist
+    def _get(self, filename, shape):
+        if filename not in self._entries:
+            return None
+        path = os.path.join(self.directory, filename)
+        try:
+            with open(path, "rb") as f:
+                blocks = np.frombuffer(zlib.decompress(f.read()), dtype=BLOCK_DTYPE).reshape(shape).copy()
+            os.utime(path)
+        except (OSError, ValueError, zlib.error):
+            self._remove(filename)
+            return None
+        self._entries.move_to_end(filename)
+        return blocks
+
+    # Schreiben eines Eintrags, danach wird bei Bedarf aufgeräumt
+    def _put(self, filename, blocks):
+        path = os.path.join(self.directory, filename)
+        data = zlib.compress(np.ascontiguousarray(blocks, dtype=BLOCK_DTYPE).tobytes(), COMPRESSION_LEVEL)
+        try:
+            with open(path + ".tmp", "wb") as f:
+                f.write(data)
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            print(f"Fehler beim Schreiben des Generierungscaches: {e}")
+            return
+        self._total += len(data) - self._entries.pop(filename, 0)
+        self._entries[filename] = len(data)
+        while self._total > self.max_bytes and len(self._entries) > 1:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, filename):
+        self._total -= self._entries.pop(filename, 0)
+        try:
+            os.remove(os.path.join(self.directory, filename))
+        except OSError:
+            pass
+
+    # Gespeicherte Chunks zu einer Liste von Chunkpositionen, Ausgabe als Dictionary der Treffer
+    def lookup(self, keys, seed, height, scale=30.0, height_ratio=[0.6, 0.0]):
+        shape = (CHUNK_SIZE, height, CHUNK_SIZE)
+        hits = {}
+        with self._lock:
+            self._scan()
+            for cx, cz in keys:
+                blocks = self._get(self._filename(cx, cz, seed, height, scale, height_ratio), shape)
+                if blocks is not None:
+                    hits[(cx, cz)] = blocks
+        return hits
+
+    # Ablegen generierter Chunks als Liste aus (cx, cz, Block-IDs)
+    def store(self, chunks, seed, height, scale=30.0, height_ratio=[0.6, 0.0]):
+        with self._lock:
+            self._scan()
+            for cx, cz, blocks in chunks:
+                self._put(self._filename(cx, cz, seed, height, scale, height_ratio), blocks)
+
+    # Chunk aus dem Cache oder neu generiert
+    def generate_chunk(self, cx, cz, seed, height, scale=30.0, height_ratio=[0.6, 0.0]):
+        blocks = self.lookup([(cx, cz)], seed, height, scale, height_ratio).get((cx, cz))
+        if blocks is None:
+            blocks = generate_chunk(cx, cz, seed, height, scale, height_ratio)
+            self.store([(cx, cz, blocks)], seed, height, scale, height_ratio)
+        return blocks
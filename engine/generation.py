@@ -0,0 +1,168 @@
+from .block import AIR_ID, BLOCK_IDS
+from .chunk import CHUNK_SIZE, BLOCK_DTYPE
+from .noise import GradientNoise
+from .structures import TREE, place_structures
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Optional
+import os
+import random
+import numpy as np
+
+# Häufig genutzte Block-IDs
+GRASS_ID = BLOCK_IDS["grass"]
+DIRT_ID = BLOCK_IDS["dirt"]
+STONE_ID = BLOCK_IDS["stone"]
+COAL_ORE_ID = BLOCK_IDS["coal_ore"]
+IRON_ORE_ID = BLOCK_IDS["iron_ore"]
+
+# Version des Geländegenerators, wird bei jeder Änderung am erzeugten Gelände erhöht.
+# Differenzspeicherungen setzen voraus, dass dasselbe Gelände wieder erzeugt wird.
+GENERATOR_VERSION = 3
+
+# Bäume stehen dort, wo das Baumrauschen diesen Wert übersteigt (etwa 1 Baum pro 200 Felder)
+TREE_THRESHOLD = 0.44
+# So weit ragen Strukturen aus Nachbarchunks herein
+STRUCTURE_MARGIN = TREE.reach
+# Höhlen: 3D-Rauschen über diesem Wert wird aus dem Stein entfernt (etwa 8 % des Steins)
+CAVE_SCALE = 16.0
+CAVE_SCALE_Y = 10.0
+CAVE_THRESHOLD = 0.24
+# Höhlenrauschen wird nur an jedem CAVE_STEP-ten Block berechnet und dazwischen linear interpoliert
+CAVE_STEP = 4
+# Erze im verbleibenden Stein aus einem gemeinsamen Rauschen, Eisen nur in der unteren Weltschicht.
+# ORE_STEP / ORE_SCALE darf nicht ganzzahlig sein, sonst lägen alle Gitterpunkte auf Nullstellen des Rauschens.
+ORE_SCALE = 6.0
+COAL_THRESHOLD = 0.27
+IRON_THRESHOLD = 0.27
+ORE_STEP = 4
+IRON_MAX_HEIGHT_RATIO = 0.35
+# Ab dieser Chunkanzahl wird auf mehrere Prozesse verteilt
+PARALLEL_MIN_CHUNKS = 64
+
+# Generation eines Chunks. Jede Säule hängt nur von Seed und Weltkoordinaten ab,
+# deshalb ist das Ergebnis unabhängig davon, welche Chunks sonst erzeugt werden.
+def generate_chunk(cx, cz, seed, height, scale=30.0, height_ratio=[0.6, 0.0]):
+    # Bereich des Chunks plus Rand für Strukturen der Nachbarchunks
+    pad = STRUCTURE_MARGIN
+    xs = (np.arange(-pad, CHUNK_SIZE + pad) + cx * CHUNK_SIZE) / scale
+    zs = (np.arange(-pad, CHUNK_SIZE + pad) + cz * CHUNK_SIZE) / scale
+
+    # Erzeugen einer Hightmap, Skalierung auf Eben und Höhe
+    max_height = int(height * height_ratio[0])
+    heightmap = ((GradientNoise(octaves=2, seed=seed).grid(xs, zs) + 1) / 1.5 * max_height).astype(int)
+
+    # Schichten abhängig vom Abstand zur Oberfläche: Gras, 3 Erde, darunter Stein
+    y_grid = np.arange(height)[None, :, None]
+    surface_y = heightmap[:, None, :]
+    blocks = np.select(
+        [y_grid > surface_y, y_grid == surface_y, y_grid > surface_y - 3],
+        [AIR_ID, GRASS_ID, DIRT_ID],
+        STONE_ID,
+    ).astype(BLOCK_DTYPE)
+
+    # Bäume an den höchsten Werten des Baumrauschens, nur auf Gras und mit Platz nach oben
+    treemap = GradientNoise(octaves=18, seed=seed + 1).grid(xs, zs)
+    tree_x, tree_z = np.nonzero((treemap > TREE_THRESHOLD) & (heightmap >= 0) & (heightmap + 1 < height - 5))
+    place_structures(blocks, TREE, np.stack([tree_x, heightmap[tree_x, tree_z] + 1, tree_z], axis=1))
+
+    blocks = np.ascontiguousarray(blocks[pad:pad + CHUNK_SIZE, :, pad:pad + CHUNK_SIZE])
+    _carve_underground(blocks, cx, cz, seed)
+    return blocks
+
+# 3D-Rauschen über einem Chunk, berechnet auf einem groben Gitter und trilinear interpoliert.
+# Das Gitter liegt an Weltkoordinaten, dadurch passen benachbarte Chunks zusammen.
+def _coarse_volume(noise, cx, cz, height, step, scale, scale_y):
+    xs = (np.arange(0, CHUNK_SIZE + step, step) + cx * CHUNK_SIZE) / scale
+    zs = (np.arange(0, CHUNK_SIZE + step, step) + cz * CHUNK_SIZE) / scale
+    ys = np.arange(0, height + step, step) / scale_y
+    values = noise.sample(xs[:, None, None], ys[None, :, None], zs[None, None, :])
+
+    # nacheinander entlang jeder Achse interpolieren
+    for axis, size in enumerate((CHUNK_SIZE, height, CHUNK_SIZE)):
+        index = np.arange(size) // step
+        t = (np.arange(size) % step / step).reshape([-1 if a == axis else 1 for a in range(3)])
+        values = np.take(values, index, axis=axis) * (1 - t) + np.take(values, index + 1, axis=axis) * t
+    return values
+
+# Höhlen und Erze aus 3D-Rauschen, nur im Stein, die unterste Schicht bleibt geschlossen.
+# Strukturen liegen über der Oberfläche und der Stein beginnt erst darunter,
+# deshalb braucht dieser Schritt keinen Rand aus den Nachbarchunks.
+def _carve_underground(blocks, cx, cz, seed):
+    # Rauschen nur bis zur obersten Schicht mit Stein, darüber ändert sich nichts
+    stone = blocks == STONE_ID
+    layers = np.flatnonzero(stone.any(axis=(0, 2)))
+    if not len(layers):
+        return
+    top = int(layers[-1]) + 1
+    underground = blocks[:, :top, :]
+    stone = stone[:, :top, :]
+    stone[:, 0, :] = False
+
+    cave_noise = _coarse_volume(GradientNoise(octaves=1, seed=seed + 2), cx, cz, top, CAVE_STEP, CAVE_SCALE, CAVE_SCALE_Y)
+    caves = (cave_noise > CAVE_THRESHOLD) & stone
+    underground[caves] = AIR_ID
+    stone &= ~caves
+
+    # Erze im übrigen Stein aus einem gemeinsamen Rauschen: Kohle bei hohen Werten, Eisen bei niedrigen und nur weiter unten
+    ore_noise = _coarse_volume(GradientNoise(octaves=1, seed=seed + 3), cx, cz, top, ORE_STEP, ORE_SCALE, ORE_SCALE)
+    underground[(ore_noise > COAL_THRESHOLD) & stone] = COAL_ORE_ID
+    iron = (ore_noise < -IRON_THRESHOLD) & stone
+    iron[:, int(blocks.shape[1] * IRON_MAX_HEIGHT_RATIO):, :] = False
+    underground[iron] = IRON_ORE_ID
+
+# Chunks, die einen um den Ursprung zentrierten Bereich abdecken
+def world_chunk_keys(world_size):
+    cx_min = -(world_size[0] // 2) // CHUNK_SIZE
+    cz_min = -(world_size[2] // 2) // CHUNK_SIZE
+    cx_max = (world_size[0] - world_size[0] // 2 - 1) // CHUNK_SIZE
+    cz_max = (world_size[2] - world_size[2] // 2 - 1) // CHUNK_SIZE
+    return [(cx, cz) for cx in range(cx_min, cx_max + 1) for cz in range(cz_min, cz_max + 1)]
+
+# Arbeitsprozess: Chunk erzeugen und direkt in den gemeinsamen Speicher schreiben
+def _generate_into_shared(shm_name, shape, index, cx, cz, seed, scale, height_ratio):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        target = np.ndarray(shape, dtype=BLOCK_DTYPE, buffer=shm.buf)
+        target[index] = generate_chunk(cx, cz, seed, shape[2], scale, height_ratio)
+        del target
+    finally:
+        shm.close()
+
+# Generation der Welt als Liste aus (cx, cz, Block-IDs).
+# Große Welten werden auf einen Prozesspool verteilt, das Ergebnis ist identisch zur seriellen Generation.
+# Mit cache (siehe gen_cache.py) werden bekannte Chunks nicht erneut generiert.
+def generate_world(world_size: list, seed: Optional[int]=None, scale=30.0, height_ratio=[0.6, 0.0], workers=None, cache=None):
+    # Seed generieren wenn keiner gegeben ist
+    if seed is None:
+      seed = random.randint(0, 2**32 - 1)
+
+    all_keys = world_chunk_keys(world_size)
+    cached = cache.lookup(all_keys, seed, world_size[1], scale, height_ratio) if cache is not None else {}
+    keys = [key for key in all_keys if key not in cached]
+    shape = (len(keys), CHUNK_SIZE, world_size[1], CHUNK_SIZE)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1 or len(keys) < PARALLEL_MIN_CHUNKS:
+        result = np.empty(shape, dtype=BLOCK_DTYPE)
+        for index, (cx, cz) in enumerate(keys):
+            result[index] = generate_chunk(cx, cz, seed, world_size[1], scale, height_ratio)
+    else:
+        shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)))
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(_generate_into_shared, shm.name, shape, index, cx, cz, seed, scale, height_ratio)
+                           for index, (cx, cz) in enumerate(keys)]
+                for future in futures:
+                    future.result()
+            result = np.ndarray(shape, dtype=BLOCK_DTYPE, buffer=shm.buf).copy()
+        finally:
+            shm.close()
+            shm.unlink()
+
+    generated = [(cx, cz, result[index]) for index, (cx, cz) in enumerate(keys)]
+    if cache is not None and generated:
+        cache.store(generated, seed, world_size[1], scale, height_ratio)
+    generated.extend((cx, cz, blocks) for (cx, cz), blocks in cached.items())
+    return generated, seed
@@ -224,11 +224,8 @@ class InputHandler:
         # Position des angeschauten Blocks
         block_pos, _ = self.renderer.get_looked_at_block(max_dist=4)
         if block_pos:
-            # Entfernen des Blocks, Zurücksetzen der letzten Spielerposition, Animation
+            # Entfernen des Blocks, Animation
             self.renderer.world.change_block_at(block_pos[0], block_pos[1], block_pos[2], None)
-            
-            # update des caches
-            self.renderer._last_player_pos = (None, None, None)
             self.renderer.trigger_hud_block_animation()
 
     # Event für Recchtsklick
@@ -289,9 +286,6 @@ class InputHandler:
                     # Platzieren des Blocks
                     selected_block_type = self.renderer.get_selected_block_type()
                     self.renderer.world.change_block_at(px, py, pz, Block(px, py, pz, block_id=selected_block_type))
-
-                    # update des caches
-                    self.renderer._last_player_pos = (None, None, None)
                     self.renderer.trigger_hud_block_animation()
     
     # Dictionary für inputstatus
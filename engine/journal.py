@@ -0,0 +1,97 @@
+from .block import BLOCK_TYPES
+from .world_format import palette_lookup
+import json
+import os
+import struct
+
+# Journal der Blockänderungen neben der Weltdatei:
+#   Kopf:      MAGIC | u16 Länge | Palette als JSON
+#   Einträge:  je Änderung i32 x, i32 y, i32 z, u8 Block-ID
+MAGIC = b"TMCJ"
+JOURNAL_EXTENSION = ".journal"
+ROTATED_SUFFIX = ".old"
+
+_LENGTH = struct.Struct("<H")
+_RECORD = struct.Struct("<iiiB")
+
+# Pfad des Journals einer Welt
+def journal_path(world_path):
+    return world_path + JOURNAL_EXTENSION
+
+# Lesen aller vollständigen Einträge eines Journals, Ausgabe von (x, y, z, Block-ID)
+def read_journal(path):
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return []
+    if len(data) < len(MAGIC) + _LENGTH.size or not data.startswith(MAGIC):
+        return []
+
+    (palette_len,) = _LENGTH.unpack_from(data, len(MAGIC))
+    start = len(MAGIC) + _LENGTH.size + palette_len
+    lookup = palette_lookup(json.loads(data[len(MAGIC) + _LENGTH.size:start].decode("utf-8")))
+
+    # ein bei einem Absturz halb geschriebener letzter Eintrag wird ignoriert
+    end = start + (len(data) - start) // _RECORD.size * _RECORD.size
+    edits = []
+    for x, y, z, block_id in _RECORD.iter_unpack(data[start:end]):
+        if lookup is not None:
+            block_id = int(lookup[block_id]) if block_id < len(lookup) else block_id
+        edits.append((x, y, z, block_id))
+    return edits
+
+# Anhängendes Journal, jede Änderung wird sofort auf den Datenträger geschrieben
+class EditJournal:
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.count = 0
+
+    # Öffnen zum Anhängen, neue Dateien bekommen einen Kopf
+    def _open(self):
+        self.file = open(self.path, "ab")
+        if self.file.tell() == 0:
+            palette = json.dumps(BLOCK_TYPES).encode("utf-8")
+            self.file.write(MAGIC + _LENGTH.pack(len(palette)) + palette)
+
+    # Anhängen einer Änderung
+    def append(self, x, y, z, block_id):
+        if self.file is None:
+            self._open()
+        self.file.write(_RECORD.pack(x, y, z, block_id))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.count += 1
+
+    # Alle Einträge in Abspielreihenfolge, zuerst das rotierte Journal
+    def replay(self):
+        return read_journal(self.path + ROTATED_SUFFIX) + read_journal(self.path)
+
+    # Beiseitelegen des Journals vor dem Verdichten, False wenn noch ein altes existiert
+    def rotate(self):
+        if os.path.exists(self.path + ROTATED_SUFFIX):
+            return False
+        self.close()
+        if os.path.exists(self.path):
+            os.replace(self.path, self.path + ROTATED_SUFFIX)
+        self.count = 0
+        return True
+
+    # Löschen des rotierten Journals, nachdem es in die Welt übernommen wurde
+    def discard_rotated(self):
+        if os.path.exists(self.path + ROTATED_SUFFIX):
+            os.remove(self.path + ROTATED_SUFFIX)
+
+    # Löschen aller Einträge nach einem vollständigen Speichern
+    def reset(self):
+        self.close()
+        self.discard_rotated()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.count = 0
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
@@ -0,0 +1,156 @@
+import numpy as np
+
+# Versatz zur Nachbarzelle je Würfelseite (-x, +x, -y, +y, -z, +z).
+# Bit i der Sichtbarkeitsmaske steht für Seite i, die Gegenseite hat das Bit i ^ 1.
+FACE_OFFSETS = ((-1, 0, 0), (1, 0, 0), (0, -1, 0), (0, 1, 0), (0, 0, -1), (0, 0, 1))
+ALL_FACES = (1 << len(FACE_OFFSETS)) - 1
+
+# Eckpunkte eines Würfels um seinen Mittelpunkt und die Ecken jeder Seite
+CUBE_CORNERS = (
+    (-0.5, -0.5, -0.5),
+    (0.5, -0.5, -0.5),
+    (0.5, 0.5, -0.5),
+    (-0.5, 0.5, -0.5),
+    (-0.5, -0.5, 0.5),
+    (0.5, -0.5, 0.5),
+    (0.5, 0.5, 0.5),
+    (-0.5, 0.5, 0.5),
+)
+FACE_CORNERS = ([0, 3, 7, 4], [1, 2, 6, 5], [0, 1, 5, 4], [2, 3, 7, 6], [0, 1, 2, 3], [4, 5, 6, 7])
+
+# Größte Kantenlänge zusammengefasster Flächen in Blöcken. Kleinere Flächen halten die
+# Fehler der Sortierung nach Abstand (Maleralgorithmus) klein.
+MAX_QUAD_SIZE = 4
+
+_QUAD_OFFSETS = np.array(CUBE_CORNERS, dtype=np.float32)[np.array(FACE_CORNERS)]
+_NORMALS = np.array(FACE_OFFSETS, dtype=np.int8)
+
+# Freie Flächen eines oder mehrerer Chunks in Weltkoordinaten, je Fläche ein Eintrag.
+# Eine Fläche fasst gleichartige, aneinandergrenzende Blockseiten zu einem Rechteck zusammen.
+class ChunkMesh:
+    FIELDS = ("cells", "sides", "ids", "quads", "centers", "indices")
+
+    def __init__(self, cells, sides, ids, quads, centers, vertices, indices):
+        # Block mit den kleinsten Koordinaten, Seite (Index in FACE_OFFSETS) und Block-ID als Farbindex
+        self.cells = cells
+        self.sides = sides
+        self.ids = ids
+        # Ecken (n, 4, 3) und Mittelpunkte (n, 3) der Flächen
+        self.quads = quads
+        self.centers = centers
+        # Eckpunktpuffer (m, 3), jede gemeinsame Ecke steht nur einmal darin,
+        # indices (n, 4) verweist für jede Fläche auf ihre Ecken
+        self.vertices = vertices
+        self.indices = indices
+
+    def __len__(self):
+        return len(self.sides)
+
+    # Normalen der Flächen mit Form (n, 3)
+    def normals(self):
+        return _NORMALS[self.sides]
+
+    # Teilmenge der Flächen zu einer Maske oder Indexliste, der Eckpunktpuffer wird verkleinert.
+    # Ausgabe als (Mesh, Indizes der behaltenen Eckpunkte im bisherigen Puffer)
+    def select_faces(self, selection):
+        faces = [getattr(self, field)[selection] for field in self.FIELDS]
+        used = np.zeros(len(self.vertices), dtype=bool)
+        used[faces[-1]] = True
+        kept = np.flatnonzero(used)
+        remap = np.cumsum(used, dtype=np.int32) - 1
+        faces[-1] = remap[faces[-1]]
+        return ChunkMesh(*faces[:-1], self.vertices[kept], faces[-1]), kept
+
+    def subset(self, selection):
+        return self.select_faces(selection)[0]
+
+    # Flächen, die mit mindestens einem ihrer Blöcke in den Quader [low, high) reichen
+    def select(self, low, high):
+        # Ausdehnung in Blöcken, entlang der Normalen ist die Fläche einen Block dick
+        extents = np.maximum(np.rint(self.quads.max(axis=1) - self.quads.min(axis=1)), 1).astype(np.int32)
+        overlaps = (self.cells < high) & (self.cells + extents > low)
+        return self.subset(np.all(overlaps, axis=1))
+
+    # Zusammenfügen mehrerer Meshes, leer ohne Eingaben
+    @classmethod
+    def concat(cls, meshes):
+        meshes = list(meshes)
+        if not meshes:
+            return cls.empty()
+        # die Eckpunktindizes jedes Meshes werden hinter die Puffer der vorherigen verschoben
+        offsets = np.cumsum([0] + [len(mesh.vertices) for mesh in meshes[:-1]])
+        indices = np.concatenate([mesh.indices + np.int32(offset) for mesh, offset in zip(meshes, offsets)])
+        faces = [np.concatenate([getattr(mesh, field) for mesh in meshes]) for field in cls.FIELDS[:-1]]
+        return cls(*faces, np.concatenate([mesh.vertices for mesh in meshes]), indices)
+
+    @classmethod
+    def empty(cls):
+        return cls(np.empty((0, 3), dtype=np.int32), np.empty(0, dtype=np.uint8), np.empty(0, dtype=np.uint8),
+                   np.empty((0, 4, 3), dtype=np.float32), np.empty((0, 3), dtype=np.float32),
+                   np.empty((0, 3), dtype=np.float32), np.empty((0, 4), dtype=np.int32))
+
+# Zusammenfassen gleicher Einträge eines 2D-Gitters (Listen von Zeilen) zu Rechtecken.
+# Ausgabe als Liste aus (Zeile, Spalte, Höhe, Breite, Wert), leere Einträge (0) bleiben frei.
+def _greedy_rectangles(grid, cells, max_size):
+    done = [[False] * len(row) for row in grid]
+    rectangles = []
+    for u, v in cells:
+        if done[u][v]:
+            continue
+        value = grid[u][v]
+        row, row_done = grid[u], done[u]
+        width = 1
+        while width < max_size and v + width < len(row) and row[v + width] == value and not row_done[v + width]:
+            width += 1
+        height = 1
+        while (height < max_size and u + height < len(grid)
+               and grid[u + height][v:v + width] == [value] * width
+               and not any(done[u + height][v:v + width])):
+            height += 1
+        for du in range(height):
+            done[u + du][v:v + width] = [True] * width
+        rectangles.append((u, v, height, width, value))
+    return rectangles
+
+# Aufbau des Meshes aus Block-IDs und Sichtbarkeitsmaske eines Chunks.
+# Je Seite und Schicht werden freie Blockseiten gleicher ID gierig zu Rechtecken bis
+# MAX_QUAD_SIZE zusammengefasst.
+def build_chunk_mesh(blocks, exposure, origin, max_size=MAX_QUAD_SIZE):
+    anchors, sides, ids, extents = [], [], [], []
+    for side, offset in enumerate(FACE_OFFSETS):
+        axis = int(np.flatnonzero(offset)[0])
+        u_axis, v_axis = [a for a in range(3) if a != axis]
+        # Block-IDs der Zellen mit freier Seite, Achsen als (Normale, u, v)
+        faces = np.where(exposure & (1 << side), blocks, 0).transpose(axis, u_axis, v_axis)
+        for layer in np.flatnonzero(faces.any(axis=(1, 2))).tolist():
+            grid = faces[layer]
+            for u, v, height, width, block_id in _greedy_rectangles(grid.tolist(), np.argwhere(grid).tolist(), max_size):
+                anchor = [0, 0, 0]
+                extent = [1, 1, 1]
+                anchor[axis], anchor[u_axis], anchor[v_axis] = layer, u, v
+                extent[u_axis], extent[v_axis] = height, width
+                anchors.append(anchor)
+                extents.append(extent)
+                sides.append(side)
+                ids.append(block_id)
+    if not anchors:
+        return ChunkMesh.empty()
+
+    cells = (np.array(anchors) + np.asarray(origin)).astype(np.int32)
+    sides = np.array(sides, dtype=np.uint8)
+    ids = np.array(ids, dtype=blocks.dtype)
+    extents = np.array(extents, dtype=np.float32)
+    # Ecken der Einheitsfläche, die positiven Ecken um die Ausdehnung verschoben
+    offsets = _QUAD_OFFSETS[sides]
+    quads = cells[:, None, :].astype(np.float32) + offsets + (offsets > 0) * (extents[:, None, :] - 1)
+    centers = cells.astype(np.float32) + (extents - 1) / 2 + _NORMALS[sides] * np.float32(0.5)
+
+    # Eckpunktpuffer: die Ecken liegen auf halben Koordinaten, um 0.5 verschoben sind es ganze Zahlen
+    # im Chunk, daraus wird ein eindeutiger Schlüssel je Gitterpunkt
+    _, height, size_z = blocks.shape
+    corners = quads.reshape(-1, 3)
+    lattice = np.rint(corners - np.asarray(origin, dtype=np.float32) + 0.5).astype(np.int64)
+    keys = (lattice[:, 0] * (height + 1) + lattice[:, 1]) * (size_z + 1) + lattice[:, 2]
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    indices = inverse.reshape(-1, 4).astype(np.int32)
+    return ChunkMesh(cells, sides, ids, quads, centers, corners[first], indices)
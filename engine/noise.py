@@ -0,0 +1,82 @@
+import itertools
+import numpy as np
+
+# Gradientenrauschen (Perlin) für ganze Koordinatengitter in einem NumPy-Aufruf.
+# Die Gradienten an den Gitterpunkten werden aus Seed und Koordinaten gehasht,
+# dadurch braucht es keine Tabelle und jeder Ausschnitt der Welt liefert dieselben Werte.
+# octaves entspricht wie bei perlin_noise der Anzahl der Gitterzellen pro Einheit.
+
+_AXIS_PRIMES = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9)
+# Jede Gradientenkomponente nutzt 21 Bits desselben Hashes, daher höchstens 3 Dimensionen
+_COMPONENT_BITS = 21
+
+# Mischen eines 64-Bit-Hashes (splitmix64)
+def _mix(h):
+    h = (h ^ (h >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    h = (h ^ (h >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return h ^ (h >> np.uint64(31))
+
+# Werte an den beiden Gitternachbarn einer Achse, gestapelt auf der vorderen Achse dieser Achse
+def _corner_pair(low, high, axis, dims):
+    corner = [1] * dims
+    corner[axis] = 2
+    return np.stack([low, high]).reshape(corner + list(low.shape))
+
+# Glättung der Abstände (6t^5 - 15t^4 + 10t^3)
+def _fade(t):
+    return t * t * t * (t * (t * 6.0 - 15.0) + 10.0)
+
+class GradientNoise:
+    def __init__(self, octaves=1, seed=0):
+        if octaves <= 0:
+            raise ValueError("octaves muss positiv sein")
+        self.octaves = octaves
+        self.seed = int(seed)
+
+    # Hash der Gitterpunkte einer Achse, wird vor dem Broadcasten berechnet
+    def _axis_hash(self, axis, lattice):
+        with np.errstate(over="ignore"):
+            salt = np.uint64((self.seed * (axis + 1) + _AXIS_PRIMES[axis - 1]) & 0xFFFFFFFFFFFFFFFF)
+            return _mix(lattice.astype(np.uint64) * np.uint64(_AXIS_PRIMES[axis]) + salt)
+
+    # Gradientenkomponente in [-1, 1] aus einem Ausschnitt des Hashes
+    @staticmethod
+    def _component(h, axis):
+        bits = (h >> np.uint64(axis * _COMPONENT_BITS)) & np.uint64((1 << _COMPONENT_BITS) - 1)
+        return bits.astype(np.float64) * (2.0 / (1 << _COMPONENT_BITS)) - 1.0
+
+    # Rauschwerte an Koordinaten-Arrays, die Arrays werden gebroadcastet.
+    # Für Gitter reichen kleine Arrays je Achse, z.B. Formen (n, 1, 1), (1, m, 1) und (1, 1, k).
+    # Alle Ecken der Gitterzellen werden gemeinsam berechnet, je Achse liegen die beiden
+    # Nachbarn auf einer eigenen vorderen Achse der Länge 2.
+    def sample(self, *coords):
+        if len(coords) > 3:
+            raise ValueError("höchstens 3 Dimensionen")
+        dims = len(coords)
+        coords = [np.asarray(c, dtype=np.float64) * self.octaves for c in coords]
+        ndim = max(c.ndim for c in coords)
+        coords = [c.reshape((1,) * (ndim - c.ndim) + c.shape) for c in coords]
+        base = [np.floor(c).astype(np.int64) for c in coords]
+        frac = [c - b for c, b in zip(coords, base)]
+        fades = [_fade(f) for f in frac]
+
+        h = 0
+        dot = 0.0
+        weight = 1.0
+        for axis, (b, fade) in enumerate(zip(base, fades)):
+            h = h ^ _corner_pair(self._axis_hash(axis, b), self._axis_hash(axis, b + 1), axis, dims)
+            weight = weight * _corner_pair(1.0 - fade, fade, axis, dims)
+        h = _mix(h)
+        for axis, f in enumerate(frac):
+            dot = dot + self._component(h, axis) * _corner_pair(f - 0, f - 1, axis, dims)
+        values = weight * dot
+
+        # Summe über die Ecken in fester Reihenfolge
+        result = 0.0
+        for offsets in itertools.product((0, 1), repeat=dims):
+            result = result + values[offsets]
+        return result
+
+    # Rauschwerte auf einem Gitter, Ausgabe mit der Form (len(xs), len(zs))
+    def grid(self, xs, zs):
+        return self.sample(np.asarray(xs)[:, None], np.asarray(zs)[None, :])
@@ -0,0 +1,239 @@
+from .chunk import CHUNK_SIZE, BLOCK_DTYPE
+import os
+import re
+import struct
+import zlib
+import numpy as np
+
+# Regionsdatei: REGION_SIZE x REGION_SIZE Chunks in Sektoren zu je SECTOR_SIZE Bytes.
+# Sektor 0 enthält die Offset-Tabelle (je Chunk u32 Startsektor, u32 Sektoranzahl),
+# jeder Chunk beginnt mit u32 Länge und u8 Kompression, danach die Daten.
+# Unkomprimierte Chunks können direkt als Speicherabbild der Datei geöffnet werden.
+# Differenz-Chunks enthalten nur die Zellen, die vom generierten Gelände abweichen:
+# zlib-komprimiert u32 Anzahl, je Zelle u32 Index im Chunk, danach je Zelle u8 Block-ID.
+REGION_SIZE = 8
+SECTOR_SIZE = 1024
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_DELTA = 2
+COMPRESSION_LEVEL = 6
+# Höchstens so viele Regionsdateien gleichzeitig offen, die am längsten unbenutzte wird geschlossen
+MAX_OPEN_REGIONS = 16
+
+_ENTRY = struct.Struct("<II")
+_PAYLOAD = struct.Struct("<IB")
+_COUNT = struct.Struct("<I")
+_REGION_NAME = re.compile(r"^r\.(-?\d+)\.(-?\d+)\.region$")
+
+# Einzelne Regionsdatei mit Offset-Tabelle
+class RegionFile:
+    # Öffnen oder Anlegen der Datei
+    def __init__(self, path):
+        self.path = path
+        if os.path.exists(path):
+            self.file = open(path, "r+b")
+            self.entries = self.read_entries(self.file)
+        else:
+            self.file = open(path, "w+b")
+            self.file.write(bytes(SECTOR_SIZE))
+            self.entries = [(0, 0)] * (REGION_SIZE * REGION_SIZE)
+
+    # Offset-Tabelle vom Anfang einer geöffneten Datei
+    @staticmethod
+    def read_entries(file):
+        table = file.read(REGION_SIZE * REGION_SIZE * _ENTRY.size)
+        return [_ENTRY.unpack_from(table, i * _ENTRY.size) for i in range(REGION_SIZE * REGION_SIZE)]
+
+    # Index eines Chunks in der Tabelle
+    @staticmethod
+    def _index(lx, lz):
+        return lx * REGION_SIZE + lz
+
+    # Lesen des Chunkkopfes, Ausgabe von (Kompression, Länge, Dateiposition der Daten) oder None
+    def locate(self, lx, lz):
+        offset, _ = self.entries[self._index(lx, lz)]
+        if not offset:
+            return None
+        self.file.seek(offset * SECTOR_SIZE)
+        length, compression = _PAYLOAD.unpack(self.file.read(_PAYLOAD.size))
+        return compression, length, offset * SECTOR_SIZE + _PAYLOAD.size
+
+    # Lesen der Rohdaten eines Chunks, Ausgabe von (Kompression, Daten) oder None
+    def read(self, lx, lz):
+        located = self.locate(lx, lz)
+        if located is None:
+            return None
+        compression, length, position = located
+        self.file.seek(position)
+        return compression, self.file.read(length)
+
+    # Schreiben eines Chunks, an derselben Stelle wenn er noch hineinpasst
+    def write(self, lx, lz, compression, data):
+        index = self._index(lx, lz)
+        payload = _PAYLOAD.pack(len(data), compression) + data
+        needed = -(-len(payload) // SECTOR_SIZE)
+        offset, count = self.entries[index]
+        if not offset or needed > count:
+            offset = self._find_free_sectors(index, needed)
+
+        self.file.seek(offset * SECTOR_SIZE)
+        self.file.write(payload + bytes(needed * SECTOR_SIZE - len(payload)))
+        self.entries[index] = (offset, needed)
+        self.file.seek(index * _ENTRY.size)
+        self.file.write(_ENTRY.pack(offset, needed))
+
+    # Erste freie Lücke ausreichender Größe, sonst das Dateiende
+    def _find_free_sectors(self, skip_index, needed):
+        used = sorted((offset, count) for i, (offset, count) in enumerate(self.entries) if offset and i != skip_index)
+        candidate = 1
+        for offset, count in used:
+            if offset - candidate >= needed:
+                return candidate
+            candidate = max(candidate, offset + count)
+        return candidate
+
+    # Schreiben auf den Datenträger
+    def flush(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+# Sammlung der Regionsdateien einer Welt.
+# Dateien werden erst beim Zugriff geöffnet, offen bleiben nur die MAX_OPEN_REGIONS zuletzt benutzten.
+class RegionStore:
+    def __init__(self, directory):
+        self.directory = directory
+        # offene Regionsdateien, die zuletzt benutzte steht am Ende
+        self.regions = {}
+        # Positionen der gespeicherten Chunks, beim ersten Bedarf aus den Offset-Tabellen gelesen
+        self._keys = None
+
+    # Regionsdatei zu Regionskoordinaten, optional neu anlegen
+    def _region(self, rx, rz, create=False):
+        region = self.regions.pop((rx, rz), None)
+        if region is None:
+            path = os.path.join(self.directory, f"r.{rx}.{rz}.region")
+            if not create and not os.path.exists(path):
+                return None
+            os.makedirs(self.directory, exist_ok=True)
+            if len(self.regions) >= MAX_OPEN_REGIONS:
+                idle = self.regions.pop(next(iter(self.regions)))
+                idle.flush()
+                idle.close()
+            region = RegionFile(path)
+        self.regions[(rx, rz)] = region
+        return region
+
+    # Menge der gespeicherten Chunks, beim ersten Aufruf werden nur die Offset-Tabellen gelesen
+    # und die Dateien gleich wieder geschlossen
+    def _stored_keys(self):
+        if self._keys is not None:
+            return self._keys
+        keys = set()
+        if os.path.isdir(self.directory):
+            for filename in os.listdir(self.directory):
+                match = _REGION_NAME.match(filename)
+                if not match:
+                    continue
+                rx, rz = int(match.group(1)), int(match.group(2))
+                region = self.regions.get((rx, rz))
+                if region is not None:
+                    entries = region.entries
+                else:
+                    with open(os.path.join(self.directory, filename), "rb") as file:
+                        entries = RegionFile.read_entries(file)
+                for lx, lz in _stored_positions(entries):
+                    keys.add((rx * REGION_SIZE + lx, rz * REGION_SIZE + lz))
+        self._keys = keys
+        return keys
+
+    # Positionen aller gespeicherten Chunks
+    def chunk_keys(self):
+        return list(self._stored_keys())
+
+    # Prüfen ob ein Chunk gespeichert ist, ohne eine Regionsdatei zu öffnen
+    def has_chunk(self, cx, cz):
+        return (cx, cz) in self._stored_keys()
+
+    # Speicherart eines gespeicherten Chunks oder None
+    def chunk_compression(self, cx, cz):
+        region = self._region(cx // REGION_SIZE, cz // REGION_SIZE)
+        if region is None:
+            return None
+        located = region.locate(cx % REGION_SIZE, cz % REGION_SIZE)
+        return None if located is None else located[0]
+
+    # Lesen der Block-IDs eines Chunks oder None.
+    # Mit memory_mapped werden unkomprimierte Chunks als Copy-on-Write-Abbild geöffnet:
+    # Seiten werden erst beim Zugriff gelesen und Änderungen bleiben bis zum Speichern im Arbeitsspeicher.
+    # base liefert für Differenz-Chunks das generierte Gelände, lookup übersetzt gespeicherte IDs einer alten Palette.
+    def read_chunk(self, cx, cz, height, memory_mapped=False, base=None, lookup=None):
+        region = self._region(cx // REGION_SIZE, cz // REGION_SIZE)
+        if region is None:
+            return None
+        shape = (CHUNK_SIZE, height, CHUNK_SIZE)
+        located = region.locate(cx % REGION_SIZE, cz % REGION_SIZE)
+        if located is None:
+            return None
+        compression, _, position = located
+        if compression == COMPRESSION_NONE and memory_mapped and lookup is None:
+            return np.memmap(region.path, dtype=BLOCK_DTYPE, mode="c", offset=position, shape=shape)
+
+        compression, data = region.read(cx % REGION_SIZE, cz % REGION_SIZE)
+        if compression == COMPRESSION_DELTA:
+            # gegen anderes Gelände angewendet wäre die Differenz falsch, also gar nicht lesen
+            if base is None:
+                raise ValueError(f"Chunk {cx}, {cz} ist als Differenz gespeichert, es fehlt das generierte Gelände")
+            indices, ids = _unpack_delta(data)
+            blocks = np.array(base(), dtype=BLOCK_DTYPE).reshape(-1)
+            blocks[indices] = lookup[ids] if lookup is not None else ids
+            return blocks.reshape(shape)
+        if compression == COMPRESSION_ZLIB:
+            data = zlib.decompress(data)
+        blocks = np.frombuffer(data, dtype=BLOCK_DTYPE).reshape(shape)
+        return lookup[blocks] if lookup is not None else blocks.copy()
+
+    # Schreiben der Block-IDs eines Chunks, als Differenz zu base wenn angegeben.
+    # Ausgabe ob etwas geschrieben wurde: Differenzen ohne Änderung werden nur über bestehende Einträge geschrieben.
+    def write_chunk(self, cx, cz, blocks, compression=COMPRESSION_ZLIB, base=None):
+        if compression == COMPRESSION_DELTA:
+            changed = np.flatnonzero(np.asarray(blocks).reshape(-1) != np.asarray(base).reshape(-1))
+            if not len(changed) and not self.has_chunk(cx, cz):
+                return False
+            data = _pack_delta(changed, np.asarray(blocks).reshape(-1)[changed])
+        else:
+            data = np.ascontiguousarray(blocks, dtype=BLOCK_DTYPE).tobytes()
+            if compression == COMPRESSION_ZLIB:
+                data = zlib.compress(data, COMPRESSION_LEVEL)
+        region = self._region(cx // REGION_SIZE, cz // REGION_SIZE, create=True)
+        region.write(cx % REGION_SIZE, cz % REGION_SIZE, compression, data)
+        self._stored_keys().add((cx, cz))
+        return True
+
+    def flush(self):
+        for region in self.regions.values():
+            region.flush()
+
+    def close(self):
+        for region in self.regions.values():
+            region.close()
+        self.regions = {}
+
+# Lokale Positionen der belegten Einträge einer Offset-Tabelle
+def _stored_positions(entries):
+    return [divmod(i, REGION_SIZE) for i, (offset, _) in enumerate(entries) if offset]
+
+# Packen einer Differenz aus Zellindizes und Block-IDs
+def _pack_delta(indices, ids):
+    data = _COUNT.pack(len(indices)) + indices.astype("<u4").tobytes() + ids.astype(BLOCK_DTYPE).tobytes()
+    return zlib.compress(data, COMPRESSION_LEVEL)
+
+# Entpacken einer Differenz, Ausgabe von (Zellindizes, Block-IDs)
+def _unpack_delta(data):
+    data = zlib.decompress(data)
+    (count,) = _COUNT.unpack_from(data)
+    indices = np.frombuffer(data, dtype="<u4", count=count, offset=_COUNT.size)
+    ids = np.frombuffer(data, dtype=BLOCK_DTYPE, count=count, offset=_COUNT.size + 4 * count)
+    return indices.astype(np.int64), ids
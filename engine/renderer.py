@@ -1,10 +1,12 @@
-from engine.block import BLOCK_COLORS
+from engine.block import AIR_ID, BLOCKS, BLOCK_COLORS
+from engine.mesh import ChunkMesh
 from game.player import Player
 import turtle
 import math
 import time
 import json
-from .camera_utils import get_camera_vectors, project_point
+import numpy as np
+from .camera_utils import Camera, project_points
 from .input_handler import InputHandler
 
 # Objekt für übersciht und Funktionensammlung
@@ -50,19 +52,16 @@ class Renderer:
         self.screen.title("3D Sandbox Game")
         self.screen.setup(width=self.config.get("window_width", 800), height=self.config.get("window_height", 600))
         self.screen.bgcolor("light blue")
+        # Bildgröße wird nur bei Größenänderungen des Fensters neu abgefragt
+        self.viewport = (self.screen.window_width(), self.screen.window_height())
+        self._window = self.screen.getcanvas().winfo_toplevel()
+        self._configure_binding = self._window.bind("<Configure>", self.on_configure, add="+")
+        self.update_camera()
         self.t = turtle.Turtle()
         self.t.hideturtle()
         self.t.speed(0)
         self.t.pensize(2)
         self.screen.tracer(0, 0)
-        self.sides = [
-            ((-1, 0, 0), [0, 3, 7, 4], 0.55),
-            ((1, 0, 0), [1, 2, 6, 5], 0.75),
-            ((0, -1, 0), [0, 1, 5, 4], 0.60),
-            ((0, 1, 0), [2, 3, 7, 6], 0.85),
-            ((0, 0, -1), [0, 1, 2, 3], 0.50),
-            ((0, 0, 1), [4, 5, 6, 7], 0.70),
-        ]
         
         # Inputhandler initiieren
         self.input_handler = InputHandler(self.screen, self.player, self, self.config)
@@ -84,6 +83,10 @@ class Renderer:
         self.fps_turtle.color('black')
         self.last_time = time.time()
         self.show_debug = False
+
+        # Autosave Intervall in Sekunden, 0 schaltet es ab
+        self.autosave_interval = self.config.get("autosave_interval", 60)
+        self.last_autosave_time = self.last_time
         
         # Turtle für das Crosshair erstellen
         self.crosshair_turtle = turtle.Turtle()
@@ -113,11 +116,18 @@ class Renderer:
         canvas.config(cursor="none")
         self.paused = False
         self.render_distance = self.config.get("render_distance", 5)
+        # Chunks um den Spieler: zusätzlicher Ring vorausgeladen, entladen erst mit Abstand
+        self.chunk_prefetch = self.config.get("chunk_prefetch", 1)
+        self.chunk_unload_margin = self.config.get("chunk_unload_margin", 2)
         self._last_player_pos = (None, None, None)
         self._last_player_yaw = None
         self._last_player_pitch = None
-        self._visible_blocks_cache = []
-        self.block_set = set()
+        self._last_world_revision = None
+        # Sichtbare Flächen als ChunkMesh und ihr quadrierter Abstand zur Kamera
+        self._visible_faces_cache = ChunkMesh.empty()
+        self._visible_faces_dist = np.empty(0)
+        # Projektion der Eckpunkte aus dem letzten Culling-Durchlauf und die Kamera dazu
+        self._visible_projection = (None, None)
 
         # laden der Definierten Blöcke
         self.available_block_types = list(BLOCK_COLORS.keys())
@@ -153,15 +163,7 @@ class Renderer:
         # shading
         self.hud_block_turtle.clear()
         block_type = self.get_selected_block_type()
-        base_color = BLOCK_COLORS.get(block_type, (255, 255, 255))
-
-        top_color_val = tuple(int(c * 0.9) for c in base_color)
-        side_color_val = tuple(int(c * 0.75) for c in base_color)
-        front_color_val = base_color
-
-        hex_front_color = f"#{front_color_val[0]:02x}{front_color_val[1]:02x}{front_color_val[2]:02x}"
-        hex_top_color = f"#{top_color_val[0]:02x}{top_color_val[1]:02x}{top_color_val[2]:02x}"
-        hex_side_color = f"#{side_color_val[0]:02x}{side_color_val[1]:02x}{side_color_val[2]:02x}"
+        hex_top_color, hex_side_color, hex_front_color = BLOCKS.get(block_type).hud_colors
         
         outline_color = "#000000"
 
@@ -257,26 +259,12 @@ class Renderer:
             self.hud_block_turtle.end_fill()
             self.hud_block_turtle.penup()
 
-    # Finden/Erzeugen der Spawnhöhe
+    # Finden/Erzeugen der Spawnhöhe: direkt über dem obersten festen Block
     def find_spawn_y(self, x, z):
-        height = self.world.blocks.shape[1]
-        
-        column_blocks = list(self.world.blocks[int(x), 0:int(height), int(z)].reshape(-1))
-        column_blocks = [x for x in column_blocks if x is not None]
-
-        max_y = -1
-        if len(column_blocks) > 0:
-            max_y = max(b.y for b in column_blocks if b is not None)
-        
-        # Überprüfen jeder Höhe
-        for y_coord in range(max_y + 2, -2, -1):
-            is_space_free = not any(b.y == y_coord for b in column_blocks)
-            is_block_below = any(b.y == y_coord - 1 for b in column_blocks)
-
-            if is_space_free and is_block_below:
-                return y_coord
-        
-        return max_y + 1
+        # der Chunk wird bei Bedarf sofort geladen oder generiert
+        self.world.ensure_chunk_at(x, z)
+        surface_y = self.world.get_surface_y(x, z)
+        return surface_y + 1 if surface_y is not None else 0
 
     # Malen des Pausemenüs
     def draw_pause_menu(self):
@@ -381,6 +369,7 @@ class Renderer:
     # Zurück zum startmenü kehren
     def exit_to_main_menu(self):
         self.save_current_world_state()
+        self.world.close()
         self.cleanup_for_main_menu()
         if self.on_exit_to_main_menu:
             self.on_exit_to_main_menu()
@@ -399,6 +388,9 @@ class Renderer:
         # keybinds lösen
         if hasattr(self, 'input_handler') and self.input_handler:
             self.input_handler.unbind_all()
+        if getattr(self, '_configure_binding', None):
+            self._window.unbind("<Configure>", self._configure_binding)
+            self._configure_binding = None
         # handler lösen
         self.screen.onclick(None, btn=1)
 
@@ -411,8 +403,9 @@ class Renderer:
 
     # Spiel beenden
     def exit_game(self):
-        # Speichern
+        # Speichern, eine laufende Hintergrundspeicherung wird vorher abgewartet
         self.save_current_world_state()
+        self.world.close()
         # Löschen und trotz Fehler beenden
         try:
             self.cleanup_for_main_menu()
@@ -422,18 +415,27 @@ class Renderer:
             # Beenden
             self.screen.bye()
 
-    # Speichern der aktuellen Welt
+    # Verpacken der Spielereigenschaften
+    def get_player_state(self):
+        return {
+            "x": self.player.x,
+            "y": self.player.y,
+            "z": self.player.z,
+            "yaw": self.player.yaw,
+            "pitch": self.player.pitch
+        }
+
+    # Speichern der aktuellen Welt, wartet auf eine laufende Hintergrundspeicherung
     def save_current_world_state(self):
         if self.world and self.world.path:
-            # Verpacken der Spielereigenschaften
-            player_state = {
-                "x": self.player.x,
-                "y": self.player.y,
-                "z": self.player.z,
-                "yaw": self.player.yaw,
-                "pitch": self.player.pitch
-            }
-            self.world.save(player_state=player_state)
+            self.world.save(player_state=self.get_player_state())
+
+    # Automatisches Speichern im Hintergrund nach Ablauf des Intervalls
+    def autosave(self, current_time):
+        if self.autosave_interval <= 0 or current_time - self.last_autosave_time < self.autosave_interval:
+            return
+        if self.world and self.world.path and self.world.save_async(player_state=self.get_player_state()):
+            self.last_autosave_time = current_time
  
     # Spielmodus wechseln
     def toggle_mode(self):
@@ -518,7 +520,9 @@ class Renderer:
 
         # Aktualisieren der Eingaben und des Spielers
         input_state = self.input_handler.get_input_state()
+        self.world.update_streaming(self.player.x, self.player.z, self.render_distance, self.chunk_prefetch, self.chunk_unload_margin)
         self.player.update(self.world, input_state, delta_time)
+        self.autosave(current_time)
 
         # kamerawerte anpassen
         self.cam_x = self.player.x
@@ -526,6 +530,7 @@ class Renderer:
         self.cam_z = self.player.z
         self.cam_yaw = self.player.yaw
         self.cam_pitch = self.player.pitch
+        self.update_camera()
 
         # Welt rendern
         self.render(delta_time)
@@ -533,76 +538,109 @@ class Renderer:
         self.screen.update()
         self.screen.ontimer(self.update, 0)
 
+    # Neue Bildgröße nach einer Größenänderung des Fensters
+    def on_configure(self, event):
+        viewport = (self.screen.window_width(), self.screen.window_height())
+        if viewport != self.viewport:
+            self.viewport = viewport
+            self.update_camera()
+            # sichtbare Flächen neu bestimmen
+            self._last_player_pos = (None, None, None)
+
+    # Kamerastand für das aktuelle Bild festhalten
+    def update_camera(self):
+        self.camera = Camera(self.cam_x, self.cam_y, self.cam_z, self.cam_yaw, self.cam_pitch,
+                             self.config['fov'], self.viewport)
+
     # Kamerarotationsvektoren weiterleitung
     def get_camera_vectors(self):
-        return get_camera_vectors(self.cam_yaw, self.cam_pitch)
+        return self.camera.forward, self.camera.right, self.camera.up
 
     # Projektion weiterleitung
     def project(self, x, y, z):
-        forward, right, up = self.get_camera_vectors()
-        win_w = self.screen.window_width()
-        win_h = self.screen.window_height()
-        fov = self.config['fov']
-        return project_point(x, y, z, 
-                             self.cam_x, self.cam_y, self.cam_z,
-                             forward, right, up, 
-                             win_w, win_h, fov)
-
-    # Sichtbare Blöcke berechnen, um Performance zu gewinnen
-    def get_visible_blocks(self):
+        return self.camera.project(x, y, z)
+
+    # Sichtbare Flächen aus den Chunk-Meshes berechnen, um Performance zu gewinnen
+    def get_visible_faces(self):
         # Gerundete Position
         current_rounded_pos = (round(self.player.x, 2), round(self.player.y, 2), round(self.player.z, 2))
         current_rounded_yaw = round(self.player.yaw, 1)
         current_rounded_pitch = round(self.player.pitch, 1)
 
-        # bei keiner Bewegung wird der Cache verwendet
+        # bei keiner Bewegung und unveränderter Welt wird der Cache verwendet
         if (current_rounded_pos == self._last_player_pos and
             current_rounded_yaw == self._last_player_yaw and
-            current_rounded_pitch == self._last_player_pitch):
-            return self._visible_blocks_cache
+            current_rounded_pitch == self._last_player_pitch and
+            self.world.revision == self._last_world_revision):
+            return self._visible_faces_cache
         
-        # Blöcke in einem Radius auflisten
+        # Freie Flächen in einem Radius auflisten
         px, py, pz = self.player.x, self.player.y, self.player.z
         radius = self.render_distance
-
-        visible_blocks = self.world.get_blocks(px, py, pz, radius)
-
-        # Frustum culling
-        visible_blocks = self.frustum_cull(visible_blocks)
+        mesh = self.world.query_mesh(px, py, pz, radius)
+
+        # Frustum culling über den Eckpunktpuffer der Chunk-Meshes, gemeinsame Ecken werden nur einmal projiziert
+        camera = self.camera
+        indices = mesh.indices
+        projected = project_points(mesh.vertices, camera)
+        visible = self.frustum_cull(mesh.vertices, camera, projected)[indices].any(axis=1)
+        # Flächen ganz hinter der Kamera fallen schon hier weg
+        visible &= (projected[1][indices] > camera.near).any(axis=1)
+
+        # Backface culling
+        cam = camera.position
+        visible &= np.sum(mesh.normals() * (cam - mesh.centers), axis=1) > 0
+        visible_faces, kept = mesh.select_faces(visible)
+        # Abstand der entferntesten Ecke zur Kamera zum Sortieren, damit große Flächen
+        # vor den Blöcken gemalt werden, die auf ihnen stehen
+        self._visible_faces_dist = np.sum((visible_faces.quads - cam) ** 2, axis=2).max(axis=1)
+        # die Projektion gilt für dieses Bild weiter und wird beim Zeichnen wiederverwendet
+        self._visible_projection = (camera, (projected[0][kept], projected[1][kept]))
         
         self._last_player_pos = current_rounded_pos
         self._last_player_yaw = current_rounded_yaw
         self._last_player_pitch = current_rounded_pitch
-        self._visible_blocks_cache = visible_blocks
-        self.block_set = set((b.x, b.y, b.z) for b in visible_blocks)
+        self._last_world_revision = self.world.revision
+        self._visible_faces_cache = visible_faces
         # Ausgaeb
-        return visible_blocks
+        return visible_faces
     
-    # Frustum culling
-    def frustum_cull(self, blocks:list):
-        win_w = self.screen.window_width()
-        win_h = self.screen.window_height()
+    # Frustum culling, Ausgabe einer Maske über die Positionen
+    # projected sind optional die schon berechneten Bildpunkte und Tiefen aus project_points
+    def frustum_cull(self, positions, camera=None, projected=None):
+        if camera is None:
+            camera = self.camera
+        win_w, win_h = camera.win_w, camera.win_h
         margin = win_w * 0.3
-        culled_blocks = []
-
-        for b in blocks:
-            uv, dz = self.project(b.x, b.y, b.z)
-            u, v = uv
-            u += win_w/2
-            v += win_h/2
-            if (u > 0-margin and u < win_w+margin and v > 0-margin and v < win_h+margin) or dz < 1:
-                culled_blocks.append(b)
-
-        return culled_blocks
+        screen, depth = projected if projected is not None else project_points(positions, camera)
+        u = screen[:, 0] + win_w/2
+        v = screen[:, 1] + win_h/2
+        on_screen = (u > 0-margin) & (u < win_w+margin) & (v > 0-margin) & (v < win_h+margin)
+        return on_screen | (depth < 1)
     
 
+    # Projektion zwischengespeicherter Flächen auf die Bildfläche, die Farbe wird nur nachgeschlagen.
+    # projected sind optional die schon berechneten Bildpunkte und Tiefen zu mesh.vertices
+    def project_faces(self, mesh, dists, projected=None):
+        camera = self.camera
+        indices = mesh.indices
+        screen, depth = projected if projected is not None else project_points(mesh.vertices, camera)
+        # Flächen ganz hinter der Kamera überspringen
+        in_front = (depth[indices] > camera.near).any(axis=1)
+        screen = screen[indices[in_front]]
+
+        face_colors = BLOCKS.face_colors
+        return [{"points": points, "dist": dist, "color": face_colors[block_id][side]}
+                for points, side, block_id, dist in zip(screen.tolist(), mesh.sides[in_front].tolist(),
+                                                        mesh.ids[in_front].tolist(), dists[in_front].tolist())]
+
     # Rendern der Welt
     def render(self, delta_time):
         # Bild Löschen
         self.t.clear()
         
         # nur das nötigste rendern
-        blocks_to_render = self.get_visible_blocks()
+        mesh = self.get_visible_faces()
         
         #scale = 200
         #win_w = self.screen.window_width()
@@ -611,9 +649,9 @@ class Renderer:
         #fov_y = math.degrees(2 * math.atan((win_h/2) / scale))
 
         # Faces der Blöcke besorgen
-        faces = []
-        for block in blocks_to_render:
-            faces.extend(block.draw(self))
+        # wurde im selben Bild mit derselben Kamera gecullt, ist jede Ecke schon projiziert
+        camera, projected = self._visible_projection
+        faces = self.project_faces(mesh, self._visible_faces_dist, projected if camera is self.camera else None)
         
         # Sortieren der Faces damit sie richtigrum abgebildet werden
         faces.sort(key=lambda f: -f["dist"])
@@ -622,12 +660,7 @@ class Renderer:
 
         for face in faces:
             points = face["points"]
-            shade = face["shade"]
-            base_color = face["color"]
-            
-            # Farben in hex Format bringen
-            shaded_color = tuple(int(c * shade) for c in base_color)
-            hex_color = f"#{shaded_color[0]:02x}{shaded_color[1]:02x}{shaded_color[2]:02x}"
+            hex_color = face["color"]
             
             # Malen der Außenlinien
             self.t.penup()
@@ -697,17 +730,9 @@ class Renderer:
 
     # Position des Angeschauten Blocks ermitteln
     def get_looked_at_block(self, max_dist=10, step=0.05):
-        # if self.player.mode == 'player':
-        x, y, z = self.player.x, self.player.y + self.player_eye_height, self.player.z
-        # else:
-        #     x, y, z = self.player.x, self.player.y, self.player.z
-
-        # Blickrichnung berechnen
-        yaw = math.radians(self.player.yaw)
-        pitch = math.radians(self.player.pitch)
-        dx = math.sin(yaw) * math.cos(pitch)
-        dy = math.sin(pitch)
-        dz = math.cos(yaw) * math.cos(pitch)
+        # Strahl aus dem Kamerastand des zuletzt gemalten Bildes
+        x, y, z = self.camera.position
+        dx, dy, dz = self.camera.forward
         last_air = None
         # tracen der Richtung bis ein Block getroffen wird
         for i in range(int(max_dist / step)):
@@ -715,7 +740,7 @@ class Renderer:
             ry = y + dy * i * step
             rz = z + dz * i * step
             bx, by, bz = round(rx), round(ry), round(rz)
-            if (bx, by, bz) in self.block_set:
+            if self.world.get_block_id(bx, by, bz) != AIR_ID:
                 return (bx, by, bz), last_air
             last_air = (bx, by, bz)
         return None, last_air
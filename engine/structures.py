@@ -0,0 +1,65 @@
+from .block import AIR_ID, BLOCK_IDS
+import numpy as np
+
+# Vorrang beim Überlappen: höhere Werte überschreiben niedrigere, Gelände hat 0.
+# Bei gleichem Vorrang gewinnt die größere Block-ID, damit die Reihenfolge der Strukturen egal ist.
+BLOCK_PRIORITY = {
+    "leaves": 1,
+    "log": 2,
+}
+
+_PRIORITY_BY_ID = np.zeros(256, dtype=np.uint16)
+for _name, _priority in BLOCK_PRIORITY.items():
+    _PRIORITY_BY_ID[BLOCK_IDS[_name]] = _priority
+
+# Vorlage einer Struktur aus Block-IDs, Luft gehört nicht zur Struktur.
+# anchor ist die Zelle der Vorlage, die auf die Platzierungsposition fällt.
+class Structure:
+    def __init__(self, name, template, anchor):
+        self.name = name
+        template = np.asarray(template, dtype=np.uint8)
+        cells = np.argwhere(template != AIR_ID)
+        # Versatz und Schlüssel (Vorrang * 256 + ID) jeder belegten Zelle
+        self.offsets = cells - np.asarray(anchor)
+        ids = template[tuple(cells.T)].astype(np.uint16)
+        self.keys = _PRIORITY_BY_ID[ids] * 256 + ids
+        # Horizontale Reichweite um die Platzierungsposition
+        self.reach = int(np.abs(self.offsets[:, [0, 2]]).max()) if len(cells) else 0
+
+    # Vorlage aus Schichten von unten nach oben, jede Schicht als Liste von Zeilen (x) mit Zeichen (z)
+    @classmethod
+    def from_layers(cls, name, layers, legend, anchor):
+        template = np.array([[[BLOCK_IDS[legend[c]] if c in legend else AIR_ID for c in row] for row in layer]
+                             for layer in layers], dtype=np.uint8)
+        # Schichten liegen als (y, x, z) vor
+        return cls(name, template.transpose(1, 0, 2), anchor)
+
+# Setzen vieler Strukturen in ein Blockarray mit wenigen Arrayoperationen.
+# positions ist ein Array aus (x, y, z) im Blockarray, Teile außerhalb werden abgeschnitten.
+def place_structures(blocks, structure, positions):
+    positions = np.asarray(positions, dtype=np.int64).reshape(-1, 3)
+    if not len(positions) or not len(structure.offsets):
+        return
+    cells = (positions[:, None, :] + structure.offsets[None, :, :]).reshape(-1, 3)
+    keys = np.broadcast_to(structure.keys, (len(positions), len(structure.keys))).reshape(-1)
+    inside = np.all((cells >= 0) & (cells < blocks.shape), axis=1)
+    cells, keys = cells[inside], keys[inside]
+
+    # höchster Schlüssel je Zelle gewinnt, das Gelände hat Vorrang 0
+    x, y, z = cells.T
+    current = blocks[x, y, z].astype(np.uint16)
+    current = _PRIORITY_BY_ID[current] * 256 + current
+    flat = np.ravel_multi_index((x, y, z), blocks.shape)
+    unique_flat, first, inverse = np.unique(flat, return_index=True, return_inverse=True)
+    best = current[first]
+    np.maximum.at(best, inverse.reshape(-1), keys)
+    blocks[np.unravel_index(unique_flat, blocks.shape)] = (best & 255).astype(blocks.dtype)
+
+# Baum: Stamm aus 4 Stämmen, darauf eine 5x5- und eine 3x3-Blattebene
+TREE = Structure.from_layers("tree", [
+    ["     ", "     ", "  L  ", "     ", "     "],
+    ["     ", "     ", "  L  ", "     ", "     "],
+    ["     ", "     ", "  L  ", "     ", "     "],
+    ["ooooo", "ooooo", "ooLoo", "ooooo", "ooooo"],
+    ["     ", " ooo ", " ooo ", " ooo ", "     "],
+], {"L": "log", "o": "leaves"}, anchor=(2, 0, 2))
@@ -1,105 +1,95 @@
-from .block import Block
-import json
+from .block import Block, AIR_ID, BLOCK_IDS
+from .chunk import Chunk, CHUNK_SIZE, BLOCK_DTYPE, OPAQUE_BY_ID, chunk_coords
+from .mesh import FACE_OFFSETS, ChunkMesh
+from .world_format import WORLD_EXTENSION, is_legacy_json, palette_lookup, read_json_world, read_world, region_directory, write_world
+from .region import COMPRESSION_DELTA, COMPRESSION_NONE, COMPRESSION_ZLIB, RegionStore
+from .journal import EditJournal, journal_path
+from .world_index import update_world_index
+from .generation import GENERATOR_VERSION, STONE_ID, generate_chunk, generate_world
+from concurrent.futures import ThreadPoolExecutor
+import math
 import numpy as np
-from perlin_noise import PerlinNoise
 from typing import Optional
 import os
 import random
+import threading
 from datetime import datetime
 
-# Generation der WElt
-def generate_world(world_size: list, seed: Optional[int]=None, scale=30.0, height_ratio=[0.6, 0.0]):
-    # Seed generieren wenn keiner gegeben ist
-    if seed is None:
-      seed = random.randint(0, 2**32 - 1)
-    np.random.seed(seed)
-
-    # leeres 3D array der Welt
-    world_array = np.full((world_size[0], world_size[1], world_size[2]), None, dtype=object)
-  
-    # Erzeugen einer Hightmap mit Perlinnoise
-    half_width = world_size[0] // 2
-    half_depth = world_size[2] // 2
-  
-    max_height = int(world_size[1] * height_ratio[0])
-    noise = PerlinNoise(octaves=2, seed=seed)
-    # Skalierung auf Eben und Höhe
-    heightmap = np.array([[int((noise([(x - half_width) / scale, (z - half_depth) / scale]) + 1) / 1.5 * max_height) for z in range(world_size[2])] for x in range(world_size[0])])
-
-    # erneute heightmap für Trees
-    noise_tree = PerlinNoise(octaves=18, seed=seed+1)
-    treemap = np.array([[noise_tree([(x - half_width) / scale, (z - half_depth) / scale]) for z in range(world_size[2])] for x in range(world_size[0])])
-    # 1 Baum pro 200 Felder
-    amount_trees = world_size[0] * world_size[2] // 200
-    # Positionen der Bäume an den höchsten Noisewerten
-    indizes = np.argsort(-treemap.reshape(-1))[:amount_trees]
-    tree_xz_coords = np.unravel_index(indizes, (world_size[0], world_size[2]))
-    tree_xz_coords = np.concatenate( [tree_xz_coords[0].reshape(-1,1), tree_xz_coords[1].reshape(-1,1)], axis=1)
-    print(tree_xz_coords)
-
-    # Iteration durch jede Achse
-    for x_coord in range(world_size[0]):
-        for z_coord in range(world_size[2]):
-            surface_y = heightmap[x_coord][z_coord]
-
-            # Platzierung von Blöcken abhängig von ihrem Abstand zur Oberfläche
-            for y_coord in range(world_size[1]):
-                if y_coord > surface_y:
-                  pass
-                elif y_coord == surface_y:
-                  world_array[x_coord, y_coord, z_coord] = {"id": "grass"}
-                elif y_coord > surface_y - 3:
-                   world_array[x_coord, y_coord, z_coord] = {"id": "dirt"}
-                else:
-                  world_array[x_coord, y_coord, z_coord] = {"id": "stone"}
-
-    # Überprüfung ob Korrdinate im Rahmen der Wlt ist ist
-    def is_valid(coord_x, coord_y, coord_z):
-        return (0 <= coord_x < world_size[0] and
-                0 <= coord_y < world_size[1] and
-                0 <= coord_z < world_size[2])
-
-    # Generation eines Baumes
-    def generate_tree_at_pos(pos3_idx):
-        for i in range(4):
-            if is_valid(pos3_idx[0], pos3_idx[1] + i, pos3_idx[2]):
-                world_array[pos3_idx[0], pos3_idx[1] + i, pos3_idx[2]] = {"id": "log"}
-            else:
-                return
-
-        leaf_y1_idx = pos3_idx[1] + 3
-        for lx_offset in range(-2, 3):
-            for lz_offset in range(-2, 3):
-                leaf_x_idx, leaf_z_idx = pos3_idx[0] + lx_offset, pos3_idx[2] + lz_offset
-                if is_valid(leaf_x_idx, leaf_y1_idx, leaf_z_idx):
-                    if world_array[leaf_x_idx, leaf_y1_idx, leaf_z_idx] is None or world_array[leaf_x_idx, leaf_y1_idx, leaf_z_idx]["id"] != "log":
-                        world_array[leaf_x_idx, leaf_y1_idx, leaf_z_idx] = {"id": "leaves"}
-
-        leaf_y2_idx = pos3_idx[1] + 4
-        for lx_offset in range(-1, 2):
-            for lz_offset in range(-1, 2):
-                leaf_x_idx, leaf_z_idx = pos3_idx[0] + lx_offset, pos3_idx[2] + lz_offset
-                if is_valid(leaf_x_idx, leaf_y2_idx, leaf_z_idx):
-                     if world_array[leaf_x_idx, leaf_y2_idx, leaf_z_idx] is None or world_array[leaf_x_idx, leaf_y2_idx, leaf_z_idx]["id"] != "log":
-                        world_array[leaf_x_idx, leaf_y2_idx, leaf_z_idx] = {"id": "leaves"}
-  
-    for tree_x_idx, tree_z_idx in tree_xz_coords:
-        if 0 <= tree_x_idx < heightmap.shape[0] and 0 <= tree_z_idx < heightmap.shape[1]:
-            surface_y_idx = heightmap[tree_x_idx, tree_z_idx]
-            tree_y_idx = surface_y_idx + 1
-
-        if world_array[tree_x_idx, surface_y_idx, tree_z_idx] is not None and \
-            world_array[tree_x_idx, surface_y_idx, tree_z_idx]["id"] == "grass" and \
-            tree_y_idx < world_size[1] - 5:
-            generate_tree_at_pos(np.array([tree_x_idx, tree_y_idx, tree_z_idx]))
-
-    return world_array, seed
+# Anzahl der Journaleinträge, ab der das Journal im Hintergrund in die Welt übernommen wird
+JOURNAL_COMPACT_EDITS = 256
+# Threads für das Laden und Generieren von Chunks um den Spieler
+STREAM_WORKERS = 2
+# Höchstens so viele Chunks gleichzeitig in Arbeit, die nächsten zuerst
+STREAM_MAX_PENDING = 8
+
+# Freier Dateipfad für eine Welt, bei Bedarf durchnummeriert
+def _unused_path(base):
+    potential_path = base + WORLD_EXTENSION
+    i = 1
+    while os.path.exists(potential_path):
+        potential_path = f"{base}_{i}{WORLD_EXTENSION}"
+        i += 1
+    return potential_path
+
+# Einmaliges Übertragen aller alten JSON-Welten eines Ordners in das Binärformat
+def migrate_json_worlds(directory="worlds"):
+    if not os.path.isdir(directory):
+        return []
+    migrated = []
+    for filename in sorted(os.listdir(directory)):
+        if is_legacy_json(filename):
+            try:
+                world = World(path=os.path.join(directory, filename))
+            except Exception as e:
+                print(f"Fehler beim Übertragen der Welt {filename}: {e}")
+                continue
+            migrated.append(world.path)
+            # Regionsdateien und Journal der übertragenen Welt wieder freigeben
+            world.close()
+    return migrated
+
+# Positionen und IDs der festen Zellen eines Blockarrays ab einer Weltposition
+def _solid_cells(blocks, origin):
+    positions = np.argwhere(blocks)
+    ids = blocks[tuple(positions.T)]
+    return positions + np.asarray(origin, dtype=np.int64), ids
+
+# Zusammenfügen mehrerer (Positionen, IDs)
+def _concat_cells(parts):
+    if not parts:
+        return np.empty((0, 3), dtype=np.int64), np.empty(0, dtype=BLOCK_DTYPE)
+    return np.concatenate([p for p, _ in parts]), np.concatenate([i for _, i in parts])
 
 # Weltobjekt
 class World:
     # Initiieren von Metadaten
-    def __init__(self, path: Optional[str] = None, generate_new_size: Optional[list] = None, world_name: Optional[str] = None, seed: Optional[int] = None):
-        self.blocks = []
+    def __init__(self, path: Optional[str] = None, generate_new_size: Optional[list] = None, world_name: Optional[str] = None, seed: Optional[int] = None, memory_mapped: bool = False, delta_saves: bool = False, gen_cache=None):
+        # Chunks nach (cx, cz), werden erst bei Bedarf angelegt oder geladen
+        self.chunks = {}
+        # Änderungszähler, steigt mit jedem geladenen, entladenen oder geänderten Chunk
+        self.revision = 0
+        self.height = 0
+        # Gespeicherte, noch nicht geladene Chunks
+        self._stored_chunks = set()
+        # Chunks unkomprimiert speichern und als Speicherabbild öffnen
+        self.memory_mapped = memory_mapped
+        # Nur Abweichungen vom generierten Gelände speichern
+        self.delta_saves = delta_saves
+        # optionaler Zwischenspeicher generierter Chunks (siehe gen_cache.py)
+        self.gen_cache = gen_cache
+        # Übersetzung gespeicherter IDs, wenn die Welt eine andere Palette hat
+        self._palette_lookup = None
+        self.generator_version = GENERATOR_VERSION
+        # Regionsdateien und Änderungsjournal des aktuellen Pfads
+        self.regions = None
+        self.journal = None
+        # Hintergrundspeicherung
+        self._io_lock = threading.Lock()
+        self._save_thread = None
+        self._failed_chunks = []
+        # Chunks, die gerade im Hintergrund geladen oder generiert werden
+        self._stream_executor = None
+        self._pending_chunks = {}
         self.world_name = world_name
         self.seed = seed
         self.path = path
@@ -112,33 +102,20 @@ class World:
         else:
             self.generate(generate_new_size)
 
-    def generate(self, world_size):
+    def generate(self, world_size=None):
         if not world_size:
             world_size = [32,16,32]
+        self.world_size = list(world_size)
+        self.height = world_size[1]
+        self.chunks = {}
         
         # generieren eines Seeds wenn keiner gegeben
         actual_seed_for_generation = self.seed if self.seed is not None else random.randint(0, 2**32 - 1)
-        world_array, self.seed = generate_world(world_size=world_size, seed=actual_seed_for_generation)
-        # Konvertieren des Numpy Arrays zu Blockobjekten
-        # self.blocks = []
-        half_width = world_array.shape[0] // 2
-        half_depth = world_array.shape[2] // 2
-        # for x_idx in range(world_array.shape[0]):
-        #     for y_coord in range(world_array.shape[1]):
-        #         for z_idx in range(world_array.shape[2]):
-        #             block_data = world_array[x_idx, y_coord, z_idx]
-        #             if block_data is not None:
-        #                 world_x = x_idx - half_width
-        #                 world_z = z_idx - half_depth
-        #                 self.blocks.append(Block(world_x, y_coord, world_z, block_data["id"]))
-
-        # Erstellen  er Block-objekte
-        for x in range(world_array.shape[0]):
-            for y in range(world_array.shape[1]):
-                for z in range(world_array.shape[2]):
-                    if world_array[x, y, z]:
-                        world_array[x, y, z] = Block(x-half_width, y, z-half_depth, world_array[x,y,z]['id'])
-        self.blocks = world_array
+        generated, self.seed = generate_world(world_size=world_size, seed=actual_seed_for_generation, cache=self.gen_cache)
+        # Startbereich um den Ursprung, der Bereich wird auf ganze Chunks aufgerundet.
+        # Alles weitere wird beim Erkunden nachgeneriert (siehe update_streaming).
+        for cx, cz, blocks in generated:
+            self.chunks[(cx, cz)] = Chunk(cx, cz, self.height, blocks, dirty=not self._regenerable())
             
         # Überprüfen des Weltordners
         if not os.path.exists("worlds"):
@@ -150,6 +127,7 @@ class World:
             
         self.world_name = os.path.splitext(os.path.basename(save_path))[0]
         self.save(save_path)
+        self.journal = EditJournal(journal_path(self.path))
 
     # Speicherpfad generieren
     def _get_save_path(self, world_name: Optional[str], seed: Optional[int]) -> str:
@@ -158,147 +136,551 @@ class World:
             os.makedirs(base_path)
 
         name_part = world_name if world_name else (str(seed) if seed is not None else "world")
-        
-        filename = f"{name_part}.json"
-        potential_path = os.path.join(base_path, filename)
-        
-        if not os.path.exists(potential_path):
-            return potential_path
-        else:
-            i = 1
-            while True:
-                numbered_filename = f"{name_part}_{i}.json"
-                potential_path = os.path.join(base_path, numbered_filename)
-                if not os.path.exists(potential_path):
-                    return potential_path
-                i += 1
+        return _unused_path(os.path.join(base_path, name_part))
         
     # Welt laden
     def load(self, path):
         self.path = path
+        # Alte JSON-Welten einmalig in das Binärformat übertragen
+        if is_legacy_json(path):
+            self._migrate_json(path)
+            return
+
         # Aus Pfad laden
         try:
-            with open(path, 'r') as f:
-                data = json.load(f)
+            header, palette, chunks = read_world(path)
         # neu generieren falls fehlschlägt
         except FileNotFoundError:
             self.generate()
             return
 
-        # Laden von metadaten
-        metadata = data.get("metadata", {})
+        self._apply_header(header, path)
+        # Chunks direkt in der Datei stammen aus Version 1 und wandern beim nächsten Speichern in Regionen
+        for cx, cz, blocks in chunks:
+            self.chunks[(cx, cz)] = Chunk(cx, cz, self.height, blocks, dirty=True)
+
+        # Chunks aus den Regionsdateien werden erst beim ersten Zugriff geladen,
+        # nur bei geänderter Palette sofort alle, damit sie umgeschrieben werden
+        self.regions = RegionStore(region_directory(path))
+        self._stored_chunks = set(self.regions.chunk_keys()) - set(self.chunks)
+        # Differenzen passen nur zum Generator, mit dem sie gespeichert wurden
+        if self.generator_version != GENERATOR_VERSION:
+            deltas = [key for key in self._stored_chunks if self.regions.chunk_compression(*key) == COMPRESSION_DELTA]
+            if deltas:
+                self.close()
+                raise ValueError(f"Welt {self.world_name} enthält {len(deltas)} Differenz-Chunks aus Generatorversion "
+                                 f"{self.generator_version}, die sich mit Version {GENERATOR_VERSION} nicht lesen lassen")
+        self._palette_lookup = palette_lookup(palette)
+        if self._palette_lookup is not None:
+            for cx, cz in list(self._stored_chunks):
+                self._load_chunk(cx, cz).dirty = True
+            self._palette_lookup = None
+
+        # Änderungen nach dem letzten Speichern aus dem Journal nachholen
+        self.journal = EditJournal(journal_path(path))
+        edits = self.journal.replay()
+        for x, y, z, block_id in edits:
+            self._set_block(x, y, z, block_id)
+        self.journal.count = len(edits)
+
+    # Übernehmen der Metadaten aus einem Weltkopf
+    def _apply_header(self, header, path):
+        metadata = header.get("metadata", {})
         self.world_name = metadata.get("world_name", os.path.splitext(os.path.basename(path))[0])
         self.seed = metadata.get("seed", None)
-        self.player_initial_state = data.get("player_state", None)
-        world_size = data.get("world_size", [64,32,64])
-        # Laden von Blockobjekten
-        self.blocks = np.full((world_size[0], world_size[1], world_size[2]), None, dtype=object)
-        half_width = self.blocks.shape[0] // 2
-        half_depth = self.blocks.shape[2] // 2
-        blocks_data = data.get('blocks', [])
-        for b in blocks_data:
-            self.blocks[b['x']+half_width, b['y'], b['z']+half_depth] = Block(b['x'], b['y'], b['z'], b.get('id', 'stone'))
-        # self.blocks = [Block(b['x'], b['y'], b['z'], b.get('id', 'stone')) for b in data.get('blocks', [])]
-
-    # Speichern der Welt
+        self.player_initial_state = header.get("player_state", None)
+        self.world_size = metadata.get("world_size", [64,32,64])
+        self.height = header.get("height", self.world_size[1])
+        # Ältere Welten ohne Angabe stammen aus der ersten Generatorversion
+        self.generator_version = metadata.get("generator_version", 1)
+        if self.generator_version != GENERATOR_VERSION:
+            print(f"Welt {self.world_name} stammt aus Generatorversion {self.generator_version}, "
+                  f"neues und nicht gespeichertes Gelände kommt aus Version {GENERATOR_VERSION} "
+                  f"und wird vollständig gespeichert")
+        self.chunks = {}
+        self._stored_chunks = set()
+        self.close()
+
+    # Übertragen einer JSON-Welt in das Binärformat, die alte Datei bleibt als .bak erhalten
+    def _migrate_json(self, path):
+        try:
+            header, coords, ids = read_json_world(path)
+        except FileNotFoundError:
+            self.generate()
+            return
+
+        self._apply_header(header, path)
+        self._place_blocks(coords, ids)
+        self.path = _unused_path(os.path.splitext(path)[0])
+        self.save()
+        self.journal = EditJournal(journal_path(self.path))
+        os.replace(path, path + ".bak")
+
+    # Speichern der Welt, nur seit dem letzten Speichern geänderte Chunks werden geschrieben
     def save(self, path: Optional[str] = None, player_state: Optional[dict] = None):
+        self.wait_for_save()
+        snapshot = self._snapshot(path, player_state)
+        if self._write_snapshot(snapshot):
+            # alle Änderungen stehen jetzt in den Regionen
+            if snapshot["regions"] is self.regions and self.journal is not None:
+                self.journal.reset()
+        elif snapshot["regions"] is self.regions:
+            self._mark_dirty(snapshot["chunks"])
+
+    # Speichern in einem Hintergrundthread, z.B. für Autosaves oder zum Verdichten des Journals.
+    # Ausgabe ob eine Speicherung gestartet wurde.
+    def save_async(self, player_state: Optional[dict] = None):
+        if self._save_thread is not None and self._save_thread.is_alive():
+            return False
+        # Das Journal wird beiseitegelegt und erst nach erfolgreichem Schreiben gelöscht
+        if self.path is None or self.journal is None or not self.journal.rotate():
+            return False
+        # Kopien der Blöcke, damit weiter gespielt werden kann
+        snapshot = self._snapshot(player_state=player_state, copy_blocks=True)
+        self._save_thread = threading.Thread(target=self._write_in_background, args=(snapshot,), daemon=True)
+        self._save_thread.start()
+        return True
+
+    def _write_in_background(self, snapshot):
+        if self._write_snapshot(snapshot):
+            self.journal.discard_rotated()
+        else:
+            self._failed_chunks = snapshot["chunks"]
+
+    # Warten auf eine laufende Hintergrundspeicherung
+    def wait_for_save(self):
+        if self._save_thread is not None:
+            self._save_thread.join()
+            self._save_thread = None
+
+    # Momentaufnahme aller zu speichernden Daten, die Chunks gelten danach als gespeichert
+    def _snapshot(self, path: Optional[str] = None, player_state: Optional[dict] = None, copy_blocks=False):
         # Festlegen des Pfades
         save_path = path if path else self.path
         if not save_path:
             save_path = self._get_save_path(self.world_name, self.seed)
             self.path = save_path
+        if player_state:
+            self.player_initial_state = player_state
 
-        dir_name = os.path.dirname(save_path)
-        if dir_name:
-            os.makedirs(dir_name, exist_ok=True)
-        elif not os.path.exists(save_path):
-            pass
-        
-        # Formatieren in JSON Format
-        blocks_data = []
-        for x in range(self.blocks.shape[0]):
-            for y in range(self.blocks.shape[1]):
-                for z in range(self.blocks.shape[2]):
-                    if self.blocks[x, y, z]:
-                        blocks_data.append({
-                            "x": self.blocks[x, y, z].x,
-                            "y": self.blocks[x, y, z].y,
-                            "z": self.blocks[x, y, z].z,
-                            "id": self.blocks[x, y, z].id
-                        })
-        # for block in self.blocks:
-        #     blocks_data.append({
-        #         "x": block.x,
-        #         "y": block.y,
-        #         "z": block.z,
-        #         "id": block.id
-        #     })
+        # bei einer fehlgeschlagenen Hintergrundspeicherung erneut schreiben
+        if self._failed_chunks:
+            self._mark_dirty(self._failed_chunks)
+            self._failed_chunks = []
         
         # hinzufügen von Metadaten
         last_saved_timestamp = datetime.now().isoformat()
 
-        data_to_save = {
+        header = {
             "metadata": {
                 "world_name": self.world_name,
                 "seed": self.seed,
                 "last_saved": last_saved_timestamp,
                 "version": "1.0",
-                "world_size": list(self.blocks.shape)
+                "world_size": self.world_size,
+                "generator_version": self.generator_version
             },
-            "player_state": player_state if player_state else self.player_initial_state,
-            "blocks": blocks_data
+            "player_state": self.player_initial_state,
+            "height": self.height
         }
 
+        # Beim Speichern unter einem neuen Pfad müssen alle Chunks geschrieben werden
+        if save_path == self.path:
+            if self.regions is None:
+                self.regions = RegionStore(region_directory(save_path))
+            regions = self.regions
+            chunks = [chunk for chunk in self.chunks.values() if chunk.dirty]
+            for chunk in chunks:
+                chunk.dirty = False
+        else:
+            regions = RegionStore(region_directory(save_path))
+            self._load_all_chunks()
+            chunks = list(self.chunks.values())
+
+        return {
+            "path": save_path,
+            "header": header,
+            "regions": regions,
+            "compression": self._chunk_compression(),
+            "chunks": [(chunk.cx, chunk.cz, chunk.blocks.copy() if copy_blocks else chunk.blocks) for chunk in chunks],
+        }
+
+    # Schreiben einer Momentaufnahme, Ausgabe ob es geklappt hat
+    def _write_snapshot(self, snapshot):
+        save_path = snapshot["path"]
+        regions = snapshot["regions"]
+        dir_name = os.path.dirname(save_path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+
         # Speichern sonst Fehlermeldung
         try:
-            with open(save_path, 'w') as f:
-                json.dump(data_to_save, f, indent=4)
-            
+            with self._io_lock:
+                for cx, cz, blocks in snapshot["chunks"]:
+                    self._write_chunk(regions, cx, cz, blocks, snapshot["compression"])
+                regions.flush()
+                write_world(save_path, snapshot["header"])
+                update_world_index(save_path, snapshot["header"])
+            return True
         except Exception as e:
             print(f"Fehler beim Speichern der Welt {save_path}: {e}")
+            return False
+        finally:
+            if regions is not self.regions:
+                regions.close()
+
+    # Speicherart der Chunks: Differenz zum Gelände, unkomprimiert für Speicherabbilder oder zlib
+    def _chunk_compression(self):
+        if self._regenerable():
+            return COMPRESSION_DELTA
+        return COMPRESSION_NONE if self.memory_mapped else COMPRESSION_ZLIB
+
+    # Generiertes Gelände eines Chunks, wenn möglich aus dem Cache
+    def _generate_chunk(self, cx, cz):
+        if self.gen_cache is not None:
+            return self.gen_cache.generate_chunk(cx, cz, self.seed, self.height)
+        return generate_chunk(cx, cz, self.seed, self.height)
+
+    # Unveränderte generierte Chunks müssen nicht gespeichert werden.
+    # Mit anderer Generatorversion als im Weltkopf entstünden Differenzen gegen das falsche Gelände.
+    def _regenerable(self):
+        return self.delta_saves and self.seed is not None and self.generator_version == GENERATOR_VERSION
+
+    # Gelände, gegen das Differenz-Chunks gebildet wurden, nur mit passender Generatorversion
+    def _delta_base(self, cx, cz):
+        if self.generator_version != GENERATOR_VERSION:
+            return None
+        return lambda: self._generate_chunk(cx, cz)
 
-    # Ausgabe von Blöcken um einen Punkt herum
+    # Schreiben eines Chunks, Differenzen werden gegen das neu generierte Gelände gebildet
+    def _write_chunk(self, regions, cx, cz, blocks, compression):
+        base = self._generate_chunk(cx, cz) if compression == COMPRESSION_DELTA else None
+        return regions.write_chunk(cx, cz, blocks, compression, base)
+
+    # Chunks erneut als ungespeichert markieren
+    def _mark_dirty(self, chunk_items):
+        for cx, cz, _ in chunk_items:
+            chunk = self.chunks.get((cx, cz))
+            if chunk is not None:
+                chunk.dirty = True
+
+    # Schließen der Regionsdateien und des Journals
+    def close(self):
+        if self._stream_executor is not None:
+            self._stream_executor.shutdown(wait=True, cancel_futures=True)
+            self._stream_executor = None
+        self._pending_chunks = {}
+        self.wait_for_save()
+        if self.journal is not None:
+            self.journal.close()
+        if self.regions is not None:
+            self.regions.close()
+            self.regions = None
+
+    # Chunk an einer Chunkposition, optional neu anlegen bzw. generieren
+    def _get_chunk(self, cx, cz, create=False):
+        chunk = self.chunks.get((cx, cz))
+        # Chunks in Arbeit gelten bis zum Ende des Auftrags als fehlend, nur mit create wird gewartet
+        if chunk is None and (cx, cz) in self._pending_chunks:
+            if not create and not self._pending_chunks[(cx, cz)].done():
+                return None
+            return self._finish_pending(cx, cz)
+        if chunk is None and (cx, cz) in self._stored_chunks:
+            chunk = self._load_chunk(cx, cz)
+        if chunk is None and create:
+            chunk = self._install_chunk(cx, cz, self._produce_chunk(cx, cz, stored=False))
+        return chunk
+
+    # Block-IDs eines Chunks aus der Regionsdatei oder neu generiert, läuft auch in den Streamingthreads
+    def _produce_chunk(self, cx, cz, stored):
+        if stored:
+            with self._io_lock:
+                return self.regions.read_chunk(cx, cz, self.height, memory_mapped=self.memory_mapped,
+                                               base=self._delta_base(cx, cz),
+                                               lookup=self._palette_lookup)
+        if self.seed is None:
+            return None
+        return self._generate_chunk(cx, cz)
+
+    # Einsetzen eines geladenen oder generierten Chunks.
+    # Neu generierte gelten als ungespeichert, außer sie lassen sich jederzeit wieder erzeugen.
+    def _install_chunk(self, cx, cz, blocks):
+        chunk = self.chunks.get((cx, cz))
+        if chunk is not None:
+            return chunk
+        stored = (cx, cz) in self._stored_chunks
+        self._stored_chunks.discard((cx, cz))
+        chunk = Chunk(cx, cz, self.height, blocks, dirty=not stored and not self._regenerable())
+        self.chunks[(cx, cz)] = chunk
+        self._invalidate_neighbour_exposure(cx, cz)
+        self.revision += 1
+        return chunk
+
+    # Geladene Nachbarchunks bei -x, +x, -z und +z, fehlende als None
+    def _neighbour_chunks(self, cx, cz):
+        return (self.chunks.get((cx - 1, cz)), self.chunks.get((cx + 1, cz)),
+                self.chunks.get((cx, cz - 1)), self.chunks.get((cx, cz + 1)))
+
+    # Die Ränder der Nachbarn hängen vom Chunk ab, ihre Masken werden neu berechnet
+    def _invalidate_neighbour_exposure(self, cx, cz):
+        for neighbour in self._neighbour_chunks(cx, cz):
+            if neighbour is not None:
+                neighbour.invalidate_exposure()
+
+    # Sofortiges Laden oder Generieren des Chunks an einer Weltposition
+    def ensure_chunk_at(self, x, z):
+        cx, cz = chunk_coords(int(x), int(z))
+        return self._get_chunk(cx, cz, create=self.seed is not None)
+
+    # Prüfen ob der Chunk an einer Weltposition im Speicher ist
+    def is_chunk_loaded(self, x, z):
+        return chunk_coords(int(math.floor(x)), int(math.floor(z))) in self.chunks
+
+    # Laden und Generieren der Chunks um den Spieler außerhalb der Bildschleife.
+    # Geladen wird bis zur Sichtweite plus prefetch Chunks, entladen ab unload_margin Chunks darüber hinaus.
+    def update_streaming(self, x, z, render_distance, prefetch=1, unload_margin=2):
+        # fertige Chunks übernehmen
+        for key, future in list(self._pending_chunks.items()):
+            if future.done():
+                self._finish_pending(*key)
+
+        center_cx, center_cz = chunk_coords(int(math.floor(x)), int(math.floor(z)))
+        load_radius = -(-int(render_distance) // CHUNK_SIZE) + prefetch
+        unload_radius = load_radius + max(unload_margin, 1)
+
+        # fehlende Chunks in Auftrag geben, die nächsten zuerst
+        if self.seed is not None or self._stored_chunks:
+            missing = [(cx, cz)
+                       for cx in range(center_cx - load_radius, center_cx + load_radius + 1)
+                       for cz in range(center_cz - load_radius, center_cz + load_radius + 1)
+                       if (cx, cz) not in self.chunks and (cx, cz) not in self._pending_chunks]
+            missing.sort(key=lambda key: (key[0] - center_cx) ** 2 + (key[1] - center_cz) ** 2)
+            if missing and self._stream_executor is None:
+                self._stream_executor = ThreadPoolExecutor(max_workers=STREAM_WORKERS)
+            for cx, cz in missing[:max(STREAM_MAX_PENDING - len(self._pending_chunks), 0)]:
+                stored = (cx, cz) in self._stored_chunks
+                if not stored and self.seed is None:
+                    continue
+                self._pending_chunks[(cx, cz)] = self._stream_executor.submit(self._produce_chunk, cx, cz, stored)
+
+        # weit entfernte Chunks entladen
+        far = [key for key in self.chunks
+               if max(abs(key[0] - center_cx), abs(key[1] - center_cz)) > unload_radius]
+        if far:
+            self._unload_chunks(far)
+
+    # Übernehmen eines Auftrags aus den Streamingthreads, wartet falls er noch läuft.
+    # Fehlgeschlagene Aufträge werden gemeldet und beim nächsten update_streaming erneut gestellt.
+    def _finish_pending(self, cx, cz):
+        future = self._pending_chunks.pop((cx, cz))
+        try:
+            blocks = future.result()
+        except Exception as e:
+            print(f"Fehler beim Laden des Chunks {(cx, cz)}: {e}")
+            return None
+        if blocks is None:
+            return None
+        return self._install_chunk(cx, cz, blocks)
+
+    # Entladen von Chunks, ungespeicherte werden vorher in ihre Regionsdatei geschrieben
+    def _unload_chunks(self, keys):
+        # Die Momentaufnahme einer laufenden Hintergrundspeicherung hat ihre Chunks schon als gespeichert
+        # markiert, sie stehen aber eventuell noch nicht in der Regionsdatei. Später erneut versuchen.
+        if self._save_thread is not None and self._save_thread.is_alive():
+            return
+        # nach einer fehlgeschlagenen Hintergrundspeicherung sind die Chunks noch nicht gespeichert
+        if self._failed_chunks:
+            self._mark_dirty(self._failed_chunks)
+            self._failed_chunks = []
+        dirty = [self.chunks[key] for key in keys if self.chunks[key].dirty]
+        if dirty:
+            if self.path is None:
+                keys = [key for key in keys if not self.chunks[key].dirty]
+            else:
+                if self.regions is None:
+                    self.regions = RegionStore(region_directory(self.path))
+                compression = self._chunk_compression()
+                try:
+                    with self._io_lock:
+                        for chunk in dirty:
+                            self._write_chunk(self.regions, chunk.cx, chunk.cz, chunk.blocks, compression)
+                        self.regions.flush()
+                except Exception as e:
+                    print(f"Fehler beim Speichern entladener Chunks: {e}")
+                    return
+                for chunk in dirty:
+                    chunk.dirty = False
+        if keys:
+            self.revision += 1
+        for key in keys:
+            del self.chunks[key]
+            self._invalidate_neighbour_exposure(*key)
+            # nie gespeicherte Chunks werden beim nächsten Mal neu generiert
+            if self.regions is not None and self.regions.has_chunk(*key):
+                self._stored_chunks.add(key)
+
+    # Laden eines gespeicherten Chunks aus seiner Regionsdatei
+    def _load_chunk(self, cx, cz):
+        return self._install_chunk(cx, cz, self._produce_chunk(cx, cz, stored=True))
+
+    # Laden aller noch nicht geladenen Chunks
+    def _load_all_chunks(self):
+        for cx, cz in list(self._stored_chunks):
+            self._load_chunk(cx, cz)
+
+    # Schreiben einzelner Blöcke aus Koordinaten- und ID-Arrays in die Chunks
+    def _place_blocks(self, coords, ids):
+        valid = (coords[:, 1] >= 0) & (coords[:, 1] < self.height)
+        coords, ids = coords[valid], ids[valid]
+        cxs, czs = chunk_coords(coords[:, 0], coords[:, 2])
+        keys, inverse = np.unique(np.stack([cxs, czs], axis=1), axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        for i, (cx, cz) in enumerate(keys.tolist()):
+            selected = inverse == i
+            # übertragene Welten enthalten alle Blöcke, deshalb leere statt generierter Chunks
+            chunk = self._get_chunk(cx, cz)
+            if chunk is None:
+                chunk = self._install_chunk(cx, cz, None)
+            chunk_x, chunk_z = chunk.get_origin()
+            local = coords[selected]
+            chunk.set_blocks(local[:, 0] - chunk_x, local[:, 1], local[:, 2] - chunk_z, ids[selected])
+            self._invalidate_neighbour_exposure(cx, cz)
+        self.revision += 1
+
+    # Chunks im Bereich [Punkt - Radius, Punkt + Radius) mit dem lokalen Ausschnitt und dessen Weltposition
+    def _query_chunks(self, x, y, z, radius):
+        x0, x1 = int(math.floor(x - radius)), int(math.floor(x + radius))
+        y0, y1 = max(int(math.floor(y - radius)), 0), min(int(math.floor(y + radius)), self.height)
+        z0, z1 = int(math.floor(z - radius)), int(math.floor(z + radius))
+        if not (x0 < x1 and y0 < y1 and z0 < z1):
+            return
+        # Nur die betroffenen Chunks durchsuchen
+        cx_min, cz_min = chunk_coords(x0, z0)
+        cx_max, cz_max = chunk_coords(x1 - 1, z1 - 1)
+        for cx in range(cx_min, cx_max + 1):
+            for cz in range(cz_min, cz_max + 1):
+                chunk = self._get_chunk(cx, cz)
+                if chunk is None:
+                    continue
+                chunk_x, chunk_z = chunk.get_origin()
+                lx0, lz0 = max(x0 - chunk_x, 0), max(z0 - chunk_z, 0)
+                area = (slice(lx0, min(x1 - chunk_x, CHUNK_SIZE)), slice(y0, y1), slice(lz0, min(z1 - chunk_z, CHUNK_SIZE)))
+                yield chunk, area, (chunk_x + lx0, y0, chunk_z + lz0)
+
+    # Feste Blöcke im Bereich [Punkt - Radius, Punkt + Radius) als Arrays:
+    # Positionen mit Form (n, 3) und Block-IDs mit Form (n,)
+    def query_blocks(self, x, y, z, radius):
+        parts = [_solid_cells(chunk.blocks[area], origin)
+                 for chunk, area, origin in self._query_chunks(x, y, z, radius)]
+        return _concat_cells(parts)
+
+    # Freie Flächen der Blöcke im Bereich [Punkt - Radius, Punkt + Radius) als ein ChunkMesh,
+    # die Meshes der Chunks werden zwischengespeichert und nur nach Änderungen neu aufgebaut
+    def query_mesh(self, x, y, z, radius):
+        meshes = []
+        for chunk, area, origin in self._query_chunks(x, y, z, radius):
+            high = [start + part.stop - part.start for start, part in zip(origin, area)]
+            meshes.append(chunk.get_mesh(self._neighbour_chunks(chunk.cx, chunk.cz)).select(origin, high))
+        return ChunkMesh.concat(meshes)
+
+    # Alle festen Blöcke der Welt chunkweise als (Positionen, Block-IDs).
+    # Gespeicherte Chunks werden nur für die Ausgabe gelesen und nicht im Speicher behalten.
+    def iter_blocks(self):
+        for chunk in list(self.chunks.values()):
+            yield _solid_cells(chunk.blocks, (chunk.cx * CHUNK_SIZE, 0, chunk.cz * CHUNK_SIZE))
+        for cx, cz in sorted(self._stored_chunks):
+            blocks = self._produce_chunk(cx, cz, stored=True)
+            if blocks is not None:
+                yield _solid_cells(blocks, (cx * CHUNK_SIZE, 0, cz * CHUNK_SIZE))
+
+    # Ausgabe von Blockobjekten um einen Punkt herum, ohne Angaben alle Blöcke der Welt
     def get_blocks(self, x=None, y=None, z=None, radius=None):
-        # bei ungültigen Eingaben alle Blöcke ausgeben
         if x is None or y is None or z is None or radius is None:
-            return list(self.blocks.reshape(-1))
-        
-        half_width = self.blocks.shape[0] // 2
-        half_depth = self.blocks.shape[2] // 2
+            parts = list(self.iter_blocks())
+        else:
+            parts = [self.query_blocks(x, y, z, radius)]
+        return [Block.from_id(bx, by, bz, block_id)
+                for positions, ids in parts
+                for (bx, by, bz), block_id in zip(positions.tolist(), ids.tolist())]
 
-        # Begrenzung der Werte
-        def minmax(mi, val, ma):
-            return int(min(max(mi, val), ma))
-        
-        # Auflisten aller Blöcke im Radius
-        nearby_blocks = self.blocks[minmax(0, x+half_width-radius, self.blocks.shape[0]):minmax(0, x+half_width+radius, self.blocks.shape[0]),
-                                    minmax(0, y-radius, self.blocks.shape[1]):minmax(0, y+radius, self.blocks.shape[1]),
-                                    minmax(0, z+half_depth-radius, self.blocks.shape[2]):minmax(0, z+half_depth+radius, self.blocks.shape[2])]
-        nearby_blocks = nearby_blocks[nearby_blocks != np.array(None)]
-
-        # Auflisten aller Blöcke im Radius
-        # for block in self.blocks:
-        #     if abs(block.x - player_x) <= render_distance and \
-        #        abs(block.y - player_y) <= render_distance and \
-        #        abs(block.z - player_z) <= render_distance:
-        #         nearby_blocks.append(block)
-        return list(nearby_blocks.reshape(-1))
+    # Chunk und lokale Position einer Weltkoordinate, None außerhalb der Welthöhe
+    def _locate(self, x, y, z, create=False):
+        x, y, z = int(x), int(y), int(z)
+        if not 0 <= y < self.height:
+            return None, None
+        cx, cz = chunk_coords(x, z)
+        chunk = self._get_chunk(cx, cz, create)
+        if chunk is None:
+            return None, None
+        return chunk, (x - cx * CHUNK_SIZE, y, z - cz * CHUNK_SIZE)
+
+    # Ausgabe der ID eines gezielten Blocks
+    def get_block_id(self, x, y, z):
+        chunk, local = self._locate(x, y, z)
+        if chunk is None:
+            return AIR_ID
+        return int(chunk.blocks[local])
 
     # Ausgabe eines gezielten Blocks
     def get_block_at(self, x, y, z):
-        x, y, z = int(x), int(y), int(z)
-        half_width = self.blocks.shape[0] // 2
-        half_depth = self.blocks.shape[2] // 2
-        # Wenn die Position in der Welt existiert
-        if x+half_width in range(self.blocks.shape[0]) and y in range(self.blocks.shape[1]) and z+half_depth in range(self.blocks.shape[2]):
-            return self.blocks[x+half_width, y, z+half_depth]
-        return None
-    
-    # Änderung eies gezielten Blocks
+        block_id = self.get_block_id(x, y, z)
+        if block_id == AIR_ID:
+            return None
+        return Block.from_id(int(x), int(y), int(z), block_id)
+
+    # Höhe des obersten festen Blocks einer Säule, None wenn es dort keinen Chunk oder keinen Block gibt
+    def get_surface_y(self, x, z):
+        chunk, local = self._locate(x, 0, z)
+        if chunk is None:
+            return None
+        top = int(chunk.get_heightmap()[local[0], local[2]])
+        return top if top >= 0 else None
+
+    # Änderung eies gezielten Blocks, val ist ein Block, ein Blockname, eine ID oder None
     def change_block_at(self, x, y, z, val):
-        x, y, z = int(x), int(y), int(z)
-        half_width = self.blocks.shape[0] // 2
-        half_depth = self.blocks.shape[2] // 2
-        # Wenn die Position in der Welt existiert
-        if x+half_width in range(self.blocks.shape[0]) and y in range(self.blocks.shape[1]) and z+half_depth in range(self.blocks.shape[2]):
-            self.blocks[x+half_width, y, z+half_depth] = val
\ No newline at end of file
+        if val is None:
+            block_id = AIR_ID
+        elif isinstance(val, Block):
+            block_id = BLOCK_IDS.get(val.id, STONE_ID)
+        elif isinstance(val, str):
+            block_id = BLOCK_IDS.get(val, STONE_ID)
+        else:
+            block_id = int(val)
+        if not self._set_block(x, y, z, block_id):
+            return
+
+        # Jede Änderung sofort im Journal sichern
+        if self.journal is not None:
+            self.journal.append(int(x), int(y), int(z), block_id)
+            if self.journal.count >= JOURNAL_COMPACT_EDITS:
+                self.save_async()
+
+    # Setzen einer Block-ID ohne Journal, Ausgabe ob die Position gültig war
+    def _set_block(self, x, y, z, block_id):
+        # Chunks nur anlegen, wenn dort ein Block entsteht oder das Gelände generiert werden kann
+        chunk, local = self._locate(x, y, z, create=block_id != AIR_ID or self.seed is not None)
+        if chunk is None:
+            return False
+        chunk.set_block(*local, block_id)
+        self._update_exposure(int(x), int(y), int(z), block_id)
+        self.revision += 1
+        return True
+
+    # Anpassen der Sichtbarkeitsmasken um eine geänderte Zelle, nur in geladenen Chunks
+    def _update_exposure(self, x, y, z, block_id):
+        mask = 0
+        for bit, (dx, dy, dz) in enumerate(FACE_OFFSETS):
+            nx, ny, nz = x + dx, y + dy, z + dz
+            neighbour = self.chunks.get(chunk_coords(nx, nz)) if 0 <= ny < self.height else None
+            if neighbour is None:
+                mask |= 1 << bit
+                continue
+            local = (nx - neighbour.cx * CHUNK_SIZE, ny, nz - neighbour.cz * CHUNK_SIZE)
+            neighbour_id = neighbour.blocks[local]
+            if not OPAQUE_BY_ID[neighbour_id]:
+                mask |= 1 << bit
+            # die zugewandte Seite des Nachbarn ist die Gegenseite
+            if neighbour_id != AIR_ID:
+                neighbour.set_face_exposed(*local, bit ^ 1, not OPAQUE_BY_ID[block_id])
+        chunk = self.chunks[chunk_coords(x, z)]
+        chunk.set_exposure(x - chunk.cx * CHUNK_SIZE, y, z - chunk.cz * CHUNK_SIZE, mask if block_id != AIR_ID else 0)
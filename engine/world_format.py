@@ -0,0 +1,122 @@
+from .block import BLOCK_IDS, BLOCK_TYPES
+from .chunk import CHUNK_SIZE, BLOCK_DTYPE
+import json
+import os
+import struct
+import zlib
+import numpy as np
+
+# Binäres Weltformat:
+#   Kopf:    MAGIC | u16 Version | u32 Länge | Metadaten als JSON
+#   Palette: u16 Anzahl | je Eintrag u8 Länge + Blockname
+#   Chunks:  u32 Anzahl | je Chunk i32 cx, i32 cz, u32 Länge, zlib-komprimierte Block-IDs
+# Ab Version 2 stehen die Chunks in Regionsdateien (siehe region.py) und die Liste ist leer.
+MAGIC = b"TMCW"
+FORMAT_VERSION = 2
+WORLD_EXTENSION = ".world"
+COMPRESSION_LEVEL = 6
+
+_HEADER = struct.Struct("<4sHI")
+_CHUNK_HEADER = struct.Struct("<iiI")
+
+# Fehler beim Lesen einer Weltdatei
+class WorldFormatError(Exception):
+    pass
+
+# Prüfen ob eine Datei eine alte JSON-Welt ist
+def is_legacy_json(path):
+    return path.endswith(".json")
+
+# Ordner der Regionsdateien einer Welt
+def region_directory(path):
+    return os.path.splitext(path)[0] + ".regions"
+
+# Schreiben einer Welt; chunks ist eine Liste aus (cx, cz, Block-IDs)
+def write_world(path, header, chunks=()):
+    parts = []
+    header_bytes = json.dumps(header).encode("utf-8")
+    parts.append(_HEADER.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+    parts.append(header_bytes)
+
+    # Palette, damit sich IDs später ändern dürfen
+    parts.append(struct.pack("<H", len(BLOCK_TYPES)))
+    for name in BLOCK_TYPES:
+        name_bytes = name.encode("utf-8")
+        parts.append(struct.pack("<B", len(name_bytes)))
+        parts.append(name_bytes)
+
+    parts.append(struct.pack("<I", len(chunks)))
+    for cx, cz, blocks in chunks:
+        data = zlib.compress(np.ascontiguousarray(blocks, dtype=BLOCK_DTYPE).tobytes(), COMPRESSION_LEVEL)
+        parts.append(_CHUNK_HEADER.pack(cx, cz, len(data)))
+        parts.append(data)
+
+    # Erst in eine temporäre Datei schreiben, damit ein Absturz die alte Welt nicht zerstört
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(b"".join(parts))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+# Lesen des Kopfes ab der aktuellen Dateiposition
+def _read_header(f, path):
+    raw = f.read(_HEADER.size)
+    if len(raw) < _HEADER.size:
+        raise WorldFormatError(f"Datei zu kurz: {path}")
+    magic, version, header_len = _HEADER.unpack(raw)
+    if magic != MAGIC:
+        raise WorldFormatError(f"Keine Weltdatei: {path}")
+    if version > FORMAT_VERSION:
+        raise WorldFormatError(f"Unbekannte Formatversion {version}: {path}")
+    return json.loads(f.read(header_len).decode("utf-8"))
+
+# Nur die Metadaten einer Welt lesen
+def read_header(path):
+    with open(path, "rb") as f:
+        return _read_header(f, path)
+
+# Übersetzungstabelle von Datei-IDs zu aktuellen IDs, None wenn sie übereinstimmen
+def palette_lookup(palette):
+    if palette == BLOCK_TYPES:
+        return None
+    return np.array([BLOCK_IDS.get(name, BLOCK_IDS["stone"]) for name in palette], dtype=BLOCK_DTYPE)
+
+# Lesen einer Welt, Ausgabe von Kopf, Palette und Liste aus (cx, cz, Block-IDs)
+def read_world(path):
+    with open(path, "rb") as f:
+        header = _read_header(f, path)
+        height = header["height"]
+
+        palette = []
+        (palette_len,) = struct.unpack("<H", f.read(2))
+        for _ in range(palette_len):
+            (name_len,) = struct.unpack("<B", f.read(1))
+            palette.append(f.read(name_len).decode("utf-8"))
+        lookup = palette_lookup(palette)
+
+        chunks = []
+        (chunk_count,) = struct.unpack("<I", f.read(4))
+        for _ in range(chunk_count):
+            cx, cz, data_len = _CHUNK_HEADER.unpack(f.read(_CHUNK_HEADER.size))
+            blocks = np.frombuffer(zlib.decompress(f.read(data_len)), dtype=BLOCK_DTYPE)
+            blocks = blocks.reshape((CHUNK_SIZE, height, CHUNK_SIZE))
+            blocks = lookup[blocks] if lookup is not None else blocks.copy()
+            chunks.append((cx, cz, blocks))
+    return header, palette, chunks
+
+# Lesen einer alten JSON-Welt, Ausgabe von Kopf, Koordinaten und IDs
+def read_json_world(path):
+    with open(path, "r") as f:
+        data = json.load(f)
+    metadata = data.get("metadata", {})
+    world_size = metadata.get("world_size", data.get("world_size", [64, 32, 64]))
+    header = {
+        "metadata": metadata,
+        "player_state": data.get("player_state", None),
+        "height": world_size[1],
+    }
+    blocks_data = data.get("blocks", [])
+    coords = np.array([(b["x"], b["y"], b["z"]) for b in blocks_data], dtype=np.int64).reshape(-1, 3)
+    ids = np.array([BLOCK_IDS.get(b.get("id", "stone"), BLOCK_IDS["stone"]) for b in blocks_data], dtype=BLOCK_DTYPE)
+    return header, coords, ids
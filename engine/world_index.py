@@ -0,0 +1,97 @@
+from .world_format import WORLD_EXTENSION, read_header
+import json
+import os
+import threading
+from datetime import datetime
+
+# Kleiner Index der Weltmetadaten im Weltordner, damit das Beitrittsmenü keine Weltdateien lesen muss.
+# Einträge gelten, solange die Änderungszeit der Weltdatei übereinstimmt.
+# Der Name endet nicht auf .json, sonst hielte migrate_json_worlds den Index für eine alte Welt.
+INDEX_FILENAME = ".world_index"
+
+_index_lock = threading.Lock()
+
+# Bekannte Datumsformate älterer Welten
+_TIMESTAMP_FORMATS = ['%Y-%m-%d %H:%M:%S.%f', '%Y-%m-%d %H:%M:%S', '%d.%m.%Y %H:%M']
+
+def _index_path(directory):
+    return os.path.join(directory, INDEX_FILENAME)
+
+# Laden des Index, bei Fehlern leer
+def _load_index(directory):
+    try:
+        with open(_index_path(directory), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _store_index(directory, index):
+    tmp_path = _index_path(directory) + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(index, f)
+    os.replace(tmp_path, _index_path(directory))
+
+# Umwandeln eines Zeitstempels in das ISO-Format, None wenn unbekannt
+def _normalize_timestamp(value):
+    if not isinstance(value, str):
+        return None
+    try:
+        return datetime.fromisoformat(value).isoformat()
+    except ValueError:
+        pass
+    for fmt in _TIMESTAMP_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).isoformat()
+        except ValueError:
+            pass
+    return None
+
+# Indexeintrag aus einem Weltkopf
+def _entry_from_header(path, header, mtime):
+    metadata = header.get("metadata", {})
+    return {
+        "name": metadata.get("world_name", os.path.splitext(os.path.basename(path))[0]),
+        "seed": metadata.get("seed", "N/A"),
+        "last_saved": _normalize_timestamp(metadata.get("last_saved")),
+        "mtime": mtime,
+    }
+
+# Aktualisieren des Eintrags einer gerade gespeicherten Welt
+def update_world_index(path, header):
+    directory = os.path.dirname(path) or "."
+    with _index_lock:
+        index = _load_index(directory)
+        index[os.path.basename(path)] = _entry_from_header(path, header, os.path.getmtime(path))
+        _store_index(directory, index)
+
+# Auflisten aller Welten eines Ordners, nur geänderte Dateien werden gelesen
+def list_worlds(directory="worlds"):
+    worlds = []
+    with _index_lock:
+        index = _load_index(directory)
+        changed = False
+        present = set()
+        for filename in os.listdir(directory):
+            if not filename.endswith(WORLD_EXTENSION):
+                continue
+            path = os.path.join(directory, filename)
+            present.add(filename)
+            mtime = os.path.getmtime(path)
+            entry = index.get(filename)
+            if entry is None or entry.get("mtime") != mtime:
+                try:
+                    entry = _entry_from_header(path, read_header(path), mtime)
+                except Exception as e:
+                    print(f"Fehler beim Laden der Welt-Metadaten {path}: {e}")
+                    continue
+                index[filename] = entry
+                changed = True
+            worlds.append(dict(entry, path=path))
+
+        # gelöschte Welten entfernen
+        for filename in set(index) - present:
+            del index[filename]
+            changed = True
+        if changed:
+            _store_index(directory, index)
+    return worlds
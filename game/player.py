@@ -1,4 +1,3 @@
-from engine.block import Block
 import math
 
 # Klasse für Entität, bewegliches Onjekt in der Welt
@@ -116,11 +115,16 @@ class Player(Entity):
             self.x += dx
             self.y += dy
             self.z += dz
+        elif not world.is_chunk_loaded(self.x - self.hitbox_center_adjustment, self.z - self.hitbox_center_adjustment):
+            # Solange der Chunk unter dem Spieler noch lädt, bleibt er stehen statt durchzufallen
+            self.y_velocity = 0
         else:
             # Im Spielermodus wird auf der Ebene Bewegt und auf Kollision überprüft
             adjustment = self.hitbox_center_adjustment
             collision_check_radius = 3
-            nearby_blocks = world.get_blocks(self.x, self.y, self.z, collision_check_radius)
+            # Positionen der festen Blöcke in der Nähe als Liste aus (x, y, z)
+            nearby_positions, _ = world.query_blocks(self.x, self.y, self.z, collision_check_radius)
+            nearby_blocks = nearby_positions.tolist()
 
             # Vorwärts und Rückwärts
             dx = move_vector[0] * math.sin(yaw_rad) * current_move_speed_actual * delta_time
@@ -140,28 +144,27 @@ class Player(Entity):
 
             # Kollision bei vertikaler Bewegung nach oben
             if self.y_velocity > 0:
-                colliding_ceiling_blocks = []
+                colliding_ceiling_ys = []
                 eff_player_x_for_collision = self.x - adjustment
                 eff_player_z_for_collision = self.z - adjustment
 
                 # Für jeden nahen Block
-                for block in nearby_blocks:
+                for block_x, block_y, block_z in nearby_blocks:
                     # Wenn es nicht auf der Ebene Kollidiert
-                    if self._intersects_xz(eff_player_x_for_collision, eff_player_z_for_collision, block.x, block.z):
+                    if self._intersects_xz(eff_player_x_for_collision, eff_player_z_for_collision, block_x, block_z):
                         current_head_y = current_y_before_vertical_move + self.height
                         potential_head_y = potential_next_y + self.height
-                        block_bottom_y = float(block.y)
+                        block_bottom_y = float(block_y)
                         
                         # Wenn mit diesem eine Kollision mit der Decke im nächsten Schritt stattfinden würde
                         if current_head_y <= block_bottom_y + 0.01 and potential_head_y >= block_bottom_y - 0.01:
                             # HInzufügen zu Liste mit Blöcken, auf die der Spieler stoßen würde
-                            colliding_ceiling_blocks.append(block)
+                            colliding_ceiling_ys.append(block_y)
                 
                 # Wenn Blöcke in dieser Liste -> Kollision
-                if colliding_ceiling_blocks:
+                if colliding_ceiling_ys:
                     # SPieler kurz darüber setzen und Fallgeschwindigkeit auf 0
-                    lowest_colliding_ceiling = min(colliding_ceiling_blocks, key=lambda b: b.y)
-                    self.y = lowest_colliding_ceiling.y - self.height - 0.001
+                    self.y = min(colliding_ceiling_ys) - self.height - 0.001
                     self.y_velocity = 0
                     potential_next_y = self.y
                 else:
@@ -169,26 +172,25 @@ class Player(Entity):
             
             # Kollision bei vertikaler Bewegung nach unten
             if self.y_velocity <= 0:
-                colliding_ground_blocks = []
+                colliding_ground_ys = []
                 eff_player_x_for_ground = self.x - adjustment
                 eff_player_z_for_ground = self.z - adjustment
 
                 # Für jeden nahen Block
-                for block in nearby_blocks:
+                for block_x, block_y, block_z in nearby_blocks:
                     # Wenn keine Kollision auf der Ebene
-                    if self._intersects_xz(eff_player_x_for_ground, eff_player_z_for_ground, block.x, block.z):
+                    if self._intersects_xz(eff_player_x_for_ground, eff_player_z_for_ground, block_x, block_z):
                         # y der Blockdecke
-                        block_top_y = float(block.y) + 1.0
+                        block_top_y = float(block_y) + 1.0
                         
                         # HInzufügen zu Liste mit Blöcken, auf die der Spieler stoßen würde
                         if current_y_before_vertical_move >= block_top_y - 0.01 and potential_next_y <= block_top_y + 0.01:
-                            colliding_ground_blocks.append(block)
+                            colliding_ground_ys.append(block_y)
                 
                 # Wenn Blöcke in dieser Liste -> Kollision
-                if colliding_ground_blocks:
+                if colliding_ground_ys:
                     # SPieler kurz darüber setzen und Fallgeschwindigkeit auf 0
-                    highest_landing_block = max(colliding_ground_blocks, key=lambda b: b.y)
-                    self.y = highest_landing_block.y + 1.0
+                    self.y = max(colliding_ground_ys) + 1.0
                     self.y_velocity = 0
                     self.on_ground = True
                     # Ansonsten: Fortsetzen der Bewegung
@@ -204,23 +206,23 @@ class Player(Entity):
             # Wenn Bewegung auf x Achse
             if dx != 0:
                 collided_x_flag = False
-                for block in nearby_blocks:
+                for block_x, block_y, block_z in nearby_blocks:
                     player_bottom = self.y
                     player_top = self.y + self.height
-                    block_bottom_y = float(block.y)
-                    block_top_y = float(block.y) + 1.0
+                    block_bottom_y = float(block_y)
+                    block_top_y = float(block_y) + 1.0
                     y_overlap = (player_bottom < block_top_y and player_top > block_bottom_y)
 
                     # Wenn es keine y Kollision geben würde
                     if y_overlap:
                         # Wenn es eine xz Kollision gibt -> x Kollision
-                        if self._intersects_xz(potential_eff_player_x, current_eff_player_z, block.x, block.z):
+                        if self._intersects_xz(potential_eff_player_x, current_eff_player_z, block_x, block_z):
                             resolved_eff_player_x = 0
                             # Anpassen der x Koordinate
                             if dx > 0:
-                                resolved_eff_player_x = float(block.x) - self.radius - 0.001
+                                resolved_eff_player_x = float(block_x) - self.radius - 0.001
                             else:
-                                resolved_eff_player_x = float(block.x) + 1.0 + self.radius + 0.001
+                                resolved_eff_player_x = float(block_x) + 1.0 + self.radius + 0.001
                             self.x = resolved_eff_player_x + adjustment
                             collided_x_flag = True
                             break
@@ -234,23 +236,23 @@ class Player(Entity):
             # Wenn Bewegung auf z Achse
             if dz != 0:
                 collided_z_flag = False
-                for block in nearby_blocks:
+                for block_x, block_y, block_z in nearby_blocks:
                     player_bottom = self.y
                     player_top = self.y + self.height
-                    block_bottom_y = float(block.y)
-                    block_top_y = float(block.y) + 1.0
+                    block_bottom_y = float(block_y)
+                    block_top_y = float(block_y) + 1.0
                     y_overlap = (player_bottom < block_top_y and player_top > block_bottom_y)
 
                     # Wenn es keine y Kollision geben würde
                     if y_overlap:
                         # Wenn es eine xz Kollision gibt -> z Kollision
-                        if self._intersects_xz(current_eff_player_x, potential_eff_player_z, block.x, block.z):
+                        if self._intersects_xz(current_eff_player_x, potential_eff_player_z, block_x, block_z):
                             resolved_eff_player_z = 0
                             # Anpassen der z Koordinate
                             if dz > 0:
-                                resolved_eff_player_z = float(block.z) - self.radius - 0.001
+                                resolved_eff_player_z = float(block_z) - self.radius - 0.001
                             else:
-                                resolved_eff_player_z = float(block.z) + 1.0 + self.radius + 0.001
+                                resolved_eff_player_z = float(block_z) + 1.0 + self.radius + 0.001
                             self.z = resolved_eff_player_z + adjustment
                             collided_z_flag = True
                             break
@@ -267,13 +269,10 @@ class Player(Entity):
     
     # freie Höhe zum Zucücksetzen finden/erzeugen
     def _find_teleport_y(self, world, x, z):
-        height = world.blocks.shape[1]
-        blocks_at_xz = list(world.blocks[int(x), 0:int(height), int(z)].reshape(-1))
-        blocks_at_xz = [x for x in blocks_at_xz if x is not None]
-        if blocks_at_xz:
-            max_y_at_xz = max(b.y for b in blocks_at_xz)
-            return max_y_at_xz + 1
+        world.ensure_chunk_at(x, z)
+        surface_y = world.get_surface_y(x, z)
+        if surface_y is not None:
+            return surface_y + 1
         else:
-            new_block = Block(x, 0, z)
-            world.blocks.change_block_at(x, 0, z, new_block)
-            return 1
\ No newline at end of file
+            world.change_block_at(x, 0, z, "stone")
+            return 1
@@ -1,6 +1,8 @@
 import turtle
 from engine.renderer import Renderer
-from engine.world import World
+from engine.world import World, migrate_json_worlds
+from engine.world_index import list_worlds
+from engine.gen_cache import GenerationCache
 import os
 import json
 from datetime import datetime
@@ -98,13 +100,27 @@ def start_game(world_path=None, world_name=None, seed=None):
     screen.onkey(None, "Return")
     screen.bgcolor("white")
 
+    # Weltoptionen aus den Configs
+    with open("config.json", "r") as f:
+        config = json.load(f)
+    memory_mapped = config.get("memory_mapped_worlds", False)
+    delta_saves = config.get("delta_saves", False)
+    # Cache generierter Chunks, 0 schaltet ihn ab
+    cache_mb = config.get("generation_cache_mb", 64)
+    gen_cache = GenerationCache(os.path.join("worlds", "gen_cache"), cache_mb * 1024 * 1024) if cache_mb > 0 else None
+
     # Welt erstellen wenn nötig
     if world_path:
-        world = World(path=world_path)
+        try:
+            world = World(path=world_path, memory_mapped=memory_mapped, delta_saves=delta_saves, gen_cache=gen_cache)
+        except ValueError as e:
+            print(f"Fehler beim Laden der Welt {world_path}: {e}")
+            draw_main_menu()
+            return
     elif world_name or seed is not None:
-        world = World(generate_new_size=[64, 32, 64], world_name=world_name if world_name else None, seed=seed)
+        world = World(generate_new_size=[64, 32, 64], world_name=world_name if world_name else None, seed=seed, memory_mapped=memory_mapped, delta_saves=delta_saves, gen_cache=gen_cache)
     else:
-        world = World(generate_new_size=[64, 32, 64])
+        world = World(generate_new_size=[64, 32, 64], memory_mapped=memory_mapped, delta_saves=delta_saves, gen_cache=gen_cache)
         
     # Renderer initiieren
     game_renderer_instance = Renderer(world=world, on_exit_to_main_menu=return_to_main_menu_from_game)
@@ -236,46 +252,21 @@ def draw_join_world_menu(refresh_cache=True):
         if not os.path.exists(worlds_dir):
             os.makedirs(worlds_dir)
         
-        # Iteration durch Welten
-        world_files = [f for f in os.listdir(worlds_dir) if f.endswith(".json")]
+        # Alte JSON-Welten einmalig übertragen
+        migrate_json_worlds(worlds_dir)
+
+        # Metadaten aus dem Index, nur geänderte Welten werden gelesen
         temp_world_data = []
-        for world_file in world_files:
-            world_path = os.path.join(worlds_dir, world_file)
-            try:
-                with open(world_path, 'r') as f:
-                    data = json.load(f)
-                metadata = data.get("metadata", {})
-                world_name = metadata.get("world_name", os.path.splitext(world_file)[0])
-                seed = metadata.get("seed", "N/A")
-                last_saved_str = metadata.get("last_saved", "N/A")
-                
-                last_saved_dt = None
-                # Datumsformat
-                if last_saved_str != "N/A":
-                    try:
-                        last_saved_dt = datetime.fromisoformat(last_saved_str)
-                    except ValueError:
-                        try:
-                            last_saved_dt = datetime.strptime(last_saved_str, '%Y-%m-%d %H:%M:%S.%f')
-                        except ValueError:
-                            try:
-                                last_saved_dt = datetime.strptime(last_saved_str, '%Y-%m-%d %H:%M:%S')
-                            except ValueError:
-                                try:
-                                    last_saved_dt = datetime.strptime(last_saved_str, '%d.%m.%Y %H:%M')
-                                except ValueError:
-                                    print(f"Ungültiges Datumsformat für last_saved in {world_file}: {last_saved_str}")
-                                    last_saved_dt = datetime.min
-
-                temp_world_data.append({
-                    "name": world_name, 
-                    "seed": seed, 
-                    "last_saved": last_saved_str,
-                    "path": world_path, 
-                    "last_saved_dt": last_saved_dt
-                })
-            except Exception as e:
-                print(f"Fehler beim Laden der Welt-Metadaten {world_path}: {e}")
+        for world_info in list_worlds(worlds_dir):
+            last_saved_str = world_info["last_saved"] or "N/A"
+            last_saved_dt = datetime.fromisoformat(world_info["last_saved"]) if world_info["last_saved"] else datetime.min
+            temp_world_data.append({
+                "name": world_info["name"], 
+                "seed": world_info["seed"], 
+                "last_saved": last_saved_str,
+                "path": world_info["path"], 
+                "last_saved_dt": last_saved_dt
+            })
 
         # Cache update
         state["world_data_cache"] = sorted(temp_world_data, key=lambda x: x["last_saved_dt"] if x["last_saved_dt"] else datetime.min, reverse=True)